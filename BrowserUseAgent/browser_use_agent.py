@@ -2,7 +2,9 @@
 # SPDX-License-Identifier: Apache-2.0
 
 
+import hashlib
 import os
+from collections import OrderedDict
 
 from browser_use import Agent, BrowserProfile
 from comps import opea_microservices, register_microservice
@@ -11,23 +13,33 @@ from fastapi import Request
 from langchain_openai import ChatOpenAI
 from pydantic import BaseModel, SecretStr
 
-LLM = None
+# LLM clients keyed by (endpoint, model, sha256 of the key), least recently used first
+LLMS = OrderedDict()
+MAX_CACHED_LLMS = 16
 BROWSER_PROFILE = None
 LLM_ENDPOINT = os.getenv("LLM_ENDPOINT", "http://0.0.0.0:8008")
 LLM_MODEL = os.getenv("LLM_MODEL", "Qwen/Qwen2.5-VL-32B-Instruct")
 
 
 def initiate_llm_and_browser(llm_endpoint: str, model: str, secret_key: str = "sk-xxxxxx"):
-    # Initialize global LLM and BrowserProfile if not already initialized
-    global LLM, BROWSER_PROFILE
-    if not LLM:
-        LLM = ChatOpenAI(base_url=f"{llm_endpoint}/v1", model=model, api_key=SecretStr(secret_key), temperature=0.1)
+    # Reuse one LLM client per (endpoint, model, key) and a single global BrowserProfile
+    global BROWSER_PROFILE
+    # Hash the key so raw secrets are not kept around as cache keys
+    key = (llm_endpoint, model, hashlib.sha256(secret_key.encode()).hexdigest())
+    llm = LLMS.get(key)
+    if llm is not None:
+        LLMS.move_to_end(key)
+    else:
+        llm = ChatOpenAI(base_url=f"{llm_endpoint}/v1", model=model, api_key=SecretStr(secret_key), temperature=0.1)
+        LLMS[key] = llm
+        if len(LLMS) > MAX_CACHED_LLMS:
+            LLMS.popitem(last=False)
     if not BROWSER_PROFILE:
         BROWSER_PROFILE = BrowserProfile(
             headless=True,
             chromium_sandbox=False,
         )
-    return LLM, BROWSER_PROFILE
+    return llm, BROWSER_PROFILE
 
 
 class BrowserUseRequest(BaseModel):
@@ -11,6 +11,9 @@ import hashlib
 import logging
 import os
 import secrets
+import threading
+import time
+from collections import OrderedDict, deque
 from datetime import datetime, timedelta
 from typing import Any, Dict, Optional
 
@@ -27,12 +30,28 @@ SECRET_KEY = os.getenv("JWT_SECRET_KEY", secrets.token_hex(32))
 ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
+# Signing key and accepted algorithms, prepared once rather than on every encode/decode
+_SECRET_KEY_BYTES = SECRET_KEY.encode()
+_ALGORITHMS = [ALGORITHM]
+
 # Password hashing context
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 # HTTP Bearer token scheme
 security = HTTPBearer()
 
+# Verified token payloads keyed by raw token, each held until min(exp, now + TTL)
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+TOKEN_CACHE_TTL = int(os.getenv("TOKEN_CACHE_TTL", "3600"))
+_token_cache: "OrderedDict[str, tuple[float, Dict[str, Any]]]" = OrderedDict()
+_token_cache_lock = threading.Lock()
+
+# Recent successful API key checks, keyed by (stored hash, digest of the presented key)
+API_KEY_CACHE_SIZE = int(os.getenv("API_KEY_CACHE_SIZE", "4096"))
+API_KEY_CACHE_TTL = int(os.getenv("API_KEY_CACHE_TTL", "60"))
+_api_key_cache: "OrderedDict[tuple[str, str], float]" = OrderedDict()
+_api_key_cache_lock = threading.Lock()
+
 
 class SecurityManager:
     """Manages authentication and authorization."""
@@ -78,7 +97,7 @@ class SecurityManager:
         )
 
         # PyJWT encode (same API as python-jose)
-        encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+        encoded_jwt = jwt.encode(to_encode, _SECRET_KEY_BYTES, algorithm=ALGORITHM)
         return encoded_jwt
 
     @staticmethod
@@ -94,10 +113,18 @@ class SecurityManager:
         Raises:
             HTTPException: If token is invalid or expired
         """
+        now = time.time()
+        with _token_cache_lock:
+            cached = _token_cache.get(token)
+            if cached is not None:
+                if cached[0] > now:
+                    _token_cache.move_to_end(token)
+                    return dict(cached[1])
+                del _token_cache[token]
+
         try:
             # PyJWT decode (same API as python-jose)
-            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-            return payload
+            payload = jwt.decode(token, _SECRET_KEY_BYTES, algorithms=_ALGORITHMS)
         except InvalidTokenError as e:
             logger.warning(f"JWT verification failed: {e}")
             raise HTTPException(
@@ -106,6 +133,14 @@ class SecurityManager:
                 headers={"WWW-Authenticate": "Bearer"},
             )
 
+        exp = payload.get("exp")
+        if isinstance(exp, (int, float)):
+            with _token_cache_lock:
+                _token_cache[token] = (min(exp, now + TOKEN_CACHE_TTL), payload)
+                if len(_token_cache) > TOKEN_CACHE_SIZE:
+                    _token_cache.popitem(last=False)
+        return dict(payload)
+
     @staticmethod
     def create_api_key() -> str:
         """Generate a secure API key."""
@@ -119,7 +154,24 @@ class SecurityManager:
     @staticmethod
     def verify_api_key(api_key: str, hashed_key: str) -> bool:
         """Verify an API key against its hash."""
-        return pwd_context.verify(api_key, hashed_key)
+        key = (hashed_key, hashlib.sha256(api_key.encode()).hexdigest())
+        now = time.time()
+        with _api_key_cache_lock:
+            expires_at = _api_key_cache.get(key)
+            if expires_at is not None:
+                if expires_at > now:
+                    _api_key_cache.move_to_end(key)
+                    return True
+                del _api_key_cache[key]
+
+        if not pwd_context.verify(api_key, hashed_key):
+            return False
+
+        with _api_key_cache_lock:
+            _api_key_cache[key] = now + API_KEY_CACHE_TTL
+            if len(_api_key_cache) > API_KEY_CACHE_SIZE:
+                _api_key_cache.popitem(last=False)
+        return True
 
 
 def get_current_user(
@@ -202,6 +254,11 @@ def get_security_headers() -> Dict[str, str]:
 
 
 # Input sanitization
+# Potentially dangerous characters, removed in a single translate pass
+# (This is basic; consider using bleach or similar for HTML)
+_DANGEROUS_CHARS_TABLE = str.maketrans("", "", "<>\"'&`")
+
+
 def sanitize_input(text: str, max_length: int = 1000) -> str:
     """Sanitize user input to prevent injection attacks.
 
@@ -219,12 +276,7 @@ def sanitize_input(text: str, max_length: int = 1000) -> str:
     text = text[:max_length]
 
     # Remove potentially dangerous characters
-    # (This is basic; consider using bleach or similar for HTML)
-    dangerous_chars = ["<", ">", '"', "'", "&", "`"]
-    for char in dangerous_chars:
-        text = text.replace(char, "")
-
-    return text.strip()
+    return text.translate(_DANGEROUS_CHARS_TABLE).strip()
 
 
 # Rate limiting helper
@@ -232,7 +284,8 @@ class RateLimiter:
     """Simple in-memory rate limiter."""
 
     def __init__(self):
-        self.requests = {}
+        # identifier -> monotonic request times, oldest first
+        self.requests: Dict[str, deque] = {}
 
     def is_allowed(self, identifier: str, max_requests: int = 60, window_seconds: int = 60) -> bool:
         """Check if request is allowed under rate limit.
@@ -245,21 +298,23 @@ class RateLimiter:
         Returns:
             True if request is allowed, False otherwise
         """
-        now = datetime.utcnow()
+        now = time.monotonic()
 
-        if identifier not in self.requests:
-            self.requests[identifier] = []
+        request_times = self.requests.get(identifier)
+        if request_times is None:
+            request_times = self.requests[identifier] = deque()
 
-        # Clean old requests
-        cutoff = now - timedelta(seconds=window_seconds)
-        self.requests[identifier] = [req_time for req_time in self.requests[identifier] if req_time > cutoff]
+        # Clean old requests (times are appended in order, so expired ones are at the front)
+        cutoff = now - window_seconds
+        while request_times and request_times[0] <= cutoff:
+            request_times.popleft()
 
         # Check limit
-        if len(self.requests[identifier]) >= max_requests:
+        if len(request_times) >= max_requests:
             return False
 
         # Add current request
-        self.requests[identifier].append(now)
+        request_times.append(now)
         return True
 
 
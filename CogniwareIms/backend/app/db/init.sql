@@ -1,6 +1,10 @@
 -- OPEA Inventory Management System - Database Schema
 -- PostgreSQL initialization script
 
+-- Bootstrap in a single transaction without waiting on a WAL flush per statement
+SET synchronous_commit = off;
+BEGIN;
+
 -- Create extensions
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 CREATE EXTENSION IF NOT EXISTS "pg_trgm";
@@ -104,14 +108,17 @@ CREATE TABLE IF NOT EXISTS activity_log (
 );
 
 -- Create indexes for better query performance
-CREATE INDEX idx_products_sku ON products(sku);
-CREATE INDEX idx_products_category ON products(category);
-CREATE INDEX idx_inventory_product ON inventory(product_id);
-CREATE INDEX idx_inventory_warehouse ON inventory(warehouse_id);
-CREATE INDEX idx_allocations_status ON allocations(status);
-CREATE INDEX idx_allocations_date ON allocations(allocation_date);
-CREATE INDEX idx_activity_log_type ON activity_log(activity_type);
-CREATE INDEX idx_activity_log_created ON activity_log(created_at DESC);
+-- (products.sku and inventory(product_id, ...) are already indexed by their UNIQUE constraints)
+CREATE INDEX IF NOT EXISTS idx_products_category ON products(category);
+CREATE INDEX IF NOT EXISTS idx_warehouses_name ON warehouses(name);
+CREATE INDEX IF NOT EXISTS idx_inventory_warehouse ON inventory(warehouse_id, product_id);
+CREATE INDEX IF NOT EXISTS idx_allocations_product ON allocations(product_id);
+CREATE INDEX IF NOT EXISTS idx_allocations_status_date ON allocations(status, allocation_date DESC);
+CREATE INDEX IF NOT EXISTS idx_allocations_date ON allocations(allocation_date);
+CREATE INDEX IF NOT EXISTS idx_activity_log_type ON activity_log(activity_type);
+CREATE INDEX IF NOT EXISTS idx_activity_log_created ON activity_log(created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_activity_log_user ON activity_log(user_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_activity_log_entity ON activity_log(entity_type, entity_id);
 
 -- Insert default users
 INSERT INTO users (email, password_hash, full_name, role) VALUES
@@ -152,3 +159,5 @@ CREATE TRIGGER update_allocations_updated_at BEFORE UPDATE ON allocations FOR EA
 CREATE TRIGGER update_assets_updated_at BEFORE UPDATE ON assets FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 CREATE TRIGGER update_ai_agents_updated_at BEFORE UPDATE ON ai_agents FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+COMMIT;
+RESET synchronous_commit;
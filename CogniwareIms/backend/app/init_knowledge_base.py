@@ -54,17 +54,18 @@ async def initialize_knowledge_base():
             # Generate embeddings in batch
             embeddings = await embedding_service.embed_batch(texts, batch_size=batch_size)
 
-            # Index each document
-            for doc, embedding in zip(batch, embeddings):
-                success = await retrieval_service.index_document(
-                    doc_id=doc["id"],
-                    text=doc["text"],
-                    embedding=embedding,
-                    metadata=doc.get("metadata", {}),
-                )
-
-                if success:
-                    total_indexed += 1
+            # Index the whole batch in one pipelined round trip
+            total_indexed += await retrieval_service.index_documents(
+                [
+                    {
+                        "id": doc["id"],
+                        "text": doc["text"],
+                        "embedding": embedding,
+                        "metadata": doc.get("metadata", {}),
+                    }
+                    for doc, embedding in zip(batch, embeddings)
+                ]
+            )
 
             logger.info(f"   Indexed {total_indexed}/{len(documents)} documents")
 
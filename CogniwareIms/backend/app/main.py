@@ -5,11 +5,14 @@ OPEA Inventory Management System - Complete Backend API
 Full integration with all OPEA GenAIComps microservices
 """
 
+import asyncio
+import copy
 import logging
 import os
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import httpx
 from app.services.csv_processor import csv_processor
@@ -17,6 +20,7 @@ from app.services.dbqna_service import dbqna_service
 from app.services.doc_summarization import doc_summarization
 
 # Import all OPEA services
+from app.services.document_parsers import shutdown_pdf_executor
 from app.services.embedding_service import embedding_service
 from app.services.file_upload_service import file_upload_service
 from app.services.graph_generator import graph_generator
@@ -124,51 +128,204 @@ USERS = {
     },
 }
 
+# Static responses for the sample endpoints, built once at import; handlers return deep copies so that
+# callers can't alter them
+SERVICE_INFO = {
+    "service": "OPEA Inventory Management System - Full Integration",
+    "version": "2.0.0",
+    "status": "active",
+    "opea_integration": "enabled",
+    "capabilities": [
+        "Embeddings",
+        "Retrieval",
+        "LLM",
+        "DBQnA",
+        "DocSummarization",
+        "Interactive Agent",
+        "Graph Generation",
+        "Continuous Learning",
+    ],
+}
+
+STOCK_LEVELS = {
+    "success": True,
+    "data": [
+        {
+            "product": "Intel Xeon 6",
+            "sku": "CPU-XN6-2024",
+            "stock": 247,
+            "status": "In Stock",
+            "trend": "+12%",
+        },
+        {
+            "product": "AMD EPYC 9004",
+            "sku": "CPU-EP9-2024",
+            "stock": 189,
+            "status": "In Stock",
+            "trend": "+8%",
+        },
+        {
+            "product": "NVIDIA H100",
+            "sku": "GPU-H100-2024",
+            "stock": 45,
+            "status": "Low Stock",
+            "trend": "-15%",
+        },
+        {
+            "product": "Samsung DDR5 64GB",
+            "sku": "RAM-DD5-64",
+            "stock": 523,
+            "status": "In Stock",
+            "trend": "+23%",
+        },
+    ],
+}
+
+DASHBOARD_STATS = {
+    "success": True,
+    "data": {
+        "total_items": 2847,
+        "warehouses": 3,
+        "allocations": 156,
+        "inventory_value": 2400000,
+        "stock_by_category": [
+            {"category": "Processors", "count": 436, "percentage": 78},
+            {"category": "GPUs", "count": 45, "percentage": 25},
+            {"category": "Memory", "count": 523, "percentage": 92},
+            {"category": "Storage", "count": 312, "percentage": 65},
+        ],
+        "recent_activity": [
+            {
+                "type": "stock_update",
+                "product": "Intel Xeon 6",
+                "details": "San Jose • +50 units",
+                "time": "2 mins ago",
+            },
+            {
+                "type": "allocation",
+                "product": "NVIDIA H100",
+                "details": "Cloud Dynamics • 35 units",
+                "time": "15 mins ago",
+            },
+            {
+                "type": "alert",
+                "product": "Warehouse",
+                "details": "Portland at 82%",
+                "time": "1 hour ago",
+            },
+        ],
+    },
+}
+
+WAREHOUSES = {
+    "success": True,
+    "data": [
+        {
+            "name": "San Jose",
+            "capacity": "15,000 sq ft",
+            "utilization": "78%",
+            "items": 2847,
+            "temp": "68°F",
+        },
+        {
+            "name": "Austin",
+            "capacity": "12,000 sq ft",
+            "utilization": "65%",
+            "items": 1923,
+            "temp": "70°F",
+        },
+        {
+            "name": "Portland",
+            "capacity": "18,000 sq ft",
+            "utilization": "82%",
+            "items": 3456,
+            "temp": "66°F",
+        },
+    ],
+}
+
+ALLOCATIONS = {
+    "success": True,
+    "data": [
+        {
+            "id": "AL-2024-001",
+            "product": "Intel Xeon 6",
+            "customer": "Tech Corp",
+            "qty": 50,
+            "status": "Pending",
+            "date": "2024-10-10",
+        },
+        {
+            "id": "AL-2024-002",
+            "product": "NVIDIA H100",
+            "customer": "AI Solutions",
+            "qty": 20,
+            "status": "Confirmed",
+            "date": "2024-10-09",
+        },
+        {
+            "id": "AL-2024-003",
+            "product": "AMD EPYC 9004",
+            "customer": "Cloud Dynamics",
+            "qty": 35,
+            "status": "Shipped",
+            "date": "2024-10-08",
+        },
+    ],
+}
+
 # ====================
 # HEALTH & STATUS
 # ====================
 
+# Seconds a healthy report is reused, so frequent probes do not hit every backing service each time.
+# Degraded reports are never reused, so recovery shows up on the next probe.
+HEALTH_CACHE_TTL = float(os.getenv("HEALTH_CACHE_TTL", "5"))
+_health_cache: Optional[Tuple[float, Dict[str, Any]]] = None
+# Concurrent probes on a cold cache wait for a single refresh instead of each hitting every service
+_health_lock = asyncio.Lock()
+
 
 @app.get("/")
 async def root():
-    return {
-        "service": "OPEA Inventory Management System - Full Integration",
-        "version": "2.0.0",
-        "status": "active",
-        "opea_integration": "enabled",
-        "capabilities": [
-            "Embeddings",
-            "Retrieval",
-            "LLM",
-            "DBQnA",
-            "DocSummarization",
-            "Interactive Agent",
-            "Graph Generation",
-            "Continuous Learning",
-        ],
-    }
+    return copy.deepcopy(SERVICE_INFO)
 
 
 @app.get("/api/health")
 async def health_check():
     """Comprehensive health check including all OPEA services."""
-
-    embedding_health = await embedding_service.health_check()
-    retrieval_health = await retrieval_service.health_check()
-    llm_health = await llm_service.health_check()
-    db_health = await dbqna_service.health_check()
-
-    return {
-        "status": ("healthy" if all([embedding_health, llm_health, db_health]) else "degraded"),
-        "timestamp": datetime.now().isoformat(),
-        "services": {
-            "api": "up",
-            "embedding_service": "up" if embedding_health else "down",
-            "retrieval_service": retrieval_health,
-            "llm_service": "up" if llm_health else "down",
-            "database": "up" if db_health else "down",
-        },
-    }
+    global _health_cache
+
+    if _health_cache is not None and time.monotonic() - _health_cache[0] < HEALTH_CACHE_TTL:
+        return _health_cache[1]
+
+    async with _health_lock:
+        # Another request may have refreshed the report while we waited
+        now = time.monotonic()
+        if _health_cache is not None and now - _health_cache[0] < HEALTH_CACHE_TTL:
+            return _health_cache[1]
+
+        embedding_health, retrieval_health, llm_health, db_health = await asyncio.gather(
+            embedding_service.health_check(),
+            retrieval_service.health_check(),
+            llm_service.health_check(),
+            dbqna_service.health_check(),
+        )
+
+        healthy = all([embedding_health, llm_health, db_health])
+        report = {
+            "status": "healthy" if healthy else "degraded",
+            "timestamp": datetime.now().isoformat(),
+            "services": {
+                "api": "up",
+                "embedding_service": "up" if embedding_health else "down",
+                "retrieval_service": retrieval_health,
+                "llm_service": "up" if llm_health else "down",
+                "database": "up" if db_health else "down",
+            },
+        }
+        _health_cache = (now, report) if healthy else None
+        return report
 
 
 # ====================
@@ -261,39 +418,7 @@ async def natural_language_to_sql(query: SQLQuery):
 async def get_stock():
     """Get stock levels."""
     # This would query actual database
-    return {
-        "success": True,
-        "data": [
-            {
-                "product": "Intel Xeon 6",
-                "sku": "CPU-XN6-2024",
-                "stock": 247,
-                "status": "In Stock",
-                "trend": "+12%",
-            },
-            {
-                "product": "AMD EPYC 9004",
-                "sku": "CPU-EP9-2024",
-                "stock": 189,
-                "status": "In Stock",
-                "trend": "+8%",
-            },
-            {
-                "product": "NVIDIA H100",
-                "sku": "GPU-H100-2024",
-                "stock": 45,
-                "status": "Low Stock",
-                "trend": "-15%",
-            },
-            {
-                "product": "Samsung DDR5 64GB",
-                "sku": "RAM-DD5-64",
-                "stock": 523,
-                "status": "In Stock",
-                "trend": "+23%",
-            },
-        ],
-    }
+    return copy.deepcopy(STOCK_LEVELS)
 
 
 # ====================
@@ -316,36 +441,50 @@ async def add_knowledge(knowledge: KnowledgeAdd):
 
 @app.post("/api/knowledge/upload-csv")
 async def upload_csv_knowledge(file: UploadFile = File(...)):
-    """Upload CSV file to add to knowledge base Automatically processes and embeds data."""
-    try:
-        # Read file content
-        content = await file.read()
+    """Upload CSV file to add to knowledge base.
 
-        # Process using file upload service
-        result = await file_upload_service.upload_and_process(filename=file.filename, content=content)
+    Kept for existing CSV upload clients; handled exactly like /api/knowledge/upload-file.
+    """
+    return await upload_knowledge_file(file)
+
+
+@app.post("/api/knowledge/upload-file")
+async def upload_knowledge_file(file: UploadFile = File(...)):
+    """Upload file (CSV, XLSX, PDF, DOCX) to knowledge base.
+
+    The format is detected from the file extension and the contents are processed and embedded automatically.
+    """
+    try:
+        # Stream the spooled upload to disk instead of reading it into memory
+        result = await file_upload_service.upload_and_process(filename=file.filename, content=file.file)
 
         return result
 
     except Exception as e:
-        logger.error(f"CSV upload error: {e}")
+        logger.error(f"File upload error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/api/knowledge/upload-file")
-async def upload_knowledge_file(file: UploadFile = File(...)):
-    """Upload file (CSV, XLSX, PDF, DOCX) to knowledge base Supports multiple file formats with automatic processing
-    Optimized for Intel Xeon processors."""
-    try:
-        # Read file content
-        content = await file.read()
+@app.post("/api/knowledge/upload-files")
+async def upload_knowledge_files(files: List[UploadFile] = File(...)):
+    """Upload several files (CSV, XLSX, PDF, DOCX) to knowledge base in one request.
 
-        # Process using file upload service
-        result = await file_upload_service.upload_and_process(filename=file.filename, content=content)
+    Files are processed concurrently with bounded parallelism.
+    """
+    if not files:
+        raise HTTPException(status_code=400, detail="No files provided")
 
-        return result
+    try:
+        results = await file_upload_service.upload_and_process_many([(file.filename, file.file) for file in files])
+
+        return {
+            "success": all(result.get("success") for result in results),
+            "results": results,
+            "count": len(results),
+        }
 
     except Exception as e:
-        logger.error(f"File upload error: {e}")
+        logger.error(f"Batch file upload error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -489,106 +628,19 @@ async def deploy_agent(agent_id: str):
 @app.get("/api/dashboard/stats")
 async def get_dashboard_stats():
     """Comprehensive dashboard statistics."""
-    return {
-        "success": True,
-        "data": {
-            "total_items": 2847,
-            "warehouses": 3,
-            "allocations": 156,
-            "inventory_value": 2400000,
-            "stock_by_category": [
-                {"category": "Processors", "count": 436, "percentage": 78},
-                {"category": "GPUs", "count": 45, "percentage": 25},
-                {"category": "Memory", "count": 523, "percentage": 92},
-                {"category": "Storage", "count": 312, "percentage": 65},
-            ],
-            "recent_activity": [
-                {
-                    "type": "stock_update",
-                    "product": "Intel Xeon 6",
-                    "details": "San Jose • +50 units",
-                    "time": "2 mins ago",
-                },
-                {
-                    "type": "allocation",
-                    "product": "NVIDIA H100",
-                    "details": "Cloud Dynamics • 35 units",
-                    "time": "15 mins ago",
-                },
-                {
-                    "type": "alert",
-                    "product": "Warehouse",
-                    "details": "Portland at 82%",
-                    "time": "1 hour ago",
-                },
-            ],
-        },
-    }
+    return copy.deepcopy(DASHBOARD_STATS)
 
 
 @app.get("/api/inventory/warehouses")
 async def get_warehouses():
     """Get warehouse information."""
-    return {
-        "success": True,
-        "data": [
-            {
-                "name": "San Jose",
-                "capacity": "15,000 sq ft",
-                "utilization": "78%",
-                "items": 2847,
-                "temp": "68°F",
-            },
-            {
-                "name": "Austin",
-                "capacity": "12,000 sq ft",
-                "utilization": "65%",
-                "items": 1923,
-                "temp": "70°F",
-            },
-            {
-                "name": "Portland",
-                "capacity": "18,000 sq ft",
-                "utilization": "82%",
-                "items": 3456,
-                "temp": "66°F",
-            },
-        ],
-    }
+    return copy.deepcopy(WAREHOUSES)
 
 
 @app.get("/api/inventory/allocations")
 async def get_allocations():
     """Get allocation records."""
-    return {
-        "success": True,
-        "data": [
-            {
-                "id": "AL-2024-001",
-                "product": "Intel Xeon 6",
-                "customer": "Tech Corp",
-                "qty": 50,
-                "status": "Pending",
-                "date": "2024-10-10",
-            },
-            {
-                "id": "AL-2024-002",
-                "product": "NVIDIA H100",
-                "customer": "AI Solutions",
-                "qty": 20,
-                "status": "Confirmed",
-                "date": "2024-10-09",
-            },
-            {
-                "id": "AL-2024-003",
-                "product": "AMD EPYC 9004",
-                "customer": "Cloud Dynamics",
-                "qty": 35,
-                "status": "Shipped",
-                "date": "2024-10-08",
-            },
-        ],
-    }
+    return copy.deepcopy(ALLOCATIONS)
 
 
 # ====================
@@ -656,6 +708,16 @@ async def startup_event():
     logger.info("✅ OPEA IMS Platform started successfully!")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush pending state and release pooled service connections on shutdown."""
+    await knowledge_manager.flush_history()
+    await embedding_service.close()
+    await retrieval_service.close()
+    await llm_service.close()
+    await asyncio.to_thread(shutdown_pdf_executor)
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -5,58 +5,123 @@
 import json
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 import pandas as pd
 
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
 logger = logging.getLogger(__name__)
 
+# The multithreaded pyarrow parser is opt-in: it infers dates, times and timestamps that the default parser keeps as
+# text, which changes row text and document metadata, and it has no option to turn that inference off
+CSV_ENGINE = "pyarrow" if pyarrow is not None and os.getenv("CSV_USE_PYARROW", "false").lower() == "true" else None
+# Raised by the pyarrow engine for unsupported options or input it can't parse
+_PYARROW_ERRORS = (ValueError, TypeError, pyarrow.ArrowException) if pyarrow is not None else (ValueError, TypeError)
+
+# Files at least this large are memory-mapped by the default parser instead of read into a buffer
+MEMORY_MAP_THRESHOLD = 1024 * 1024  # 1MB
+
+
+def read_csv(path, **kwargs) -> pd.DataFrame:
+    """Read a CSV file, with the pyarrow parser when CSV_USE_PYARROW is enabled and the default parser otherwise."""
+    if CSV_ENGINE is not None:
+        try:
+            return pd.read_csv(path, engine=CSV_ENGINE, **kwargs)
+        except _PYARROW_ERRORS as e:
+            logger.debug(f"pyarrow CSV parse failed for {path}, retrying with default parser: {e}")
+        if hasattr(path, "seek"):
+            path.seek(0)
+
+    if isinstance(path, (str, os.PathLike)):
+        try:
+            if os.path.getsize(path) >= MEMORY_MAP_THRESHOLD:
+                kwargs.setdefault("memory_map", True)
+        except OSError:
+            pass
+    return pd.read_csv(path, **kwargs)
+
+
+def iter_row_texts(df: pd.DataFrame) -> Iterator[Tuple[Any, str]]:
+    """Yield (index, "col: value | ...") for each row, skipping missing values.
+
+    Values keep their column dtype, so integers render as "5" even beside float columns (iterrows gave "5.0").
+    """
+    # Format each "column: " label once rather than once per cell
+    prefixes = [f"{col}: " for col in df.columns]
+    present = df.notna().to_numpy()
+    for idx, values, mask in zip(df.index, df.itertuples(index=False, name=None), present):
+        yield idx, " | ".join([prefix + str(value) for prefix, value, ok in zip(prefixes, values, mask) if ok])
+
 
 class CSVProcessor:
     """Process CSV files for inventory data."""
 
+    MAX_LOAD_WORKERS = 4
+
     def __init__(self, data_dir: str = "/data"):
         self.data_dir = Path(data_dir)
         self.processed_data = {}
+        # Parsed frames keyed by path, reused while the file's (mtime_ns, size) is unchanged
+        self._frame_cache: Dict[str, Tuple[Tuple[int, int], pd.DataFrame]] = {}
+
+    def _load_csv_file(self, csv_file: Path) -> Optional[pd.DataFrame]:
+        """Load a single CSV file, returning None if it cannot be parsed."""
+        try:
+            stat = csv_file.stat()
+            signature = (stat.st_mtime_ns, stat.st_size)
+            cached = self._frame_cache.get(str(csv_file))
+            if cached is not None and cached[0] == signature:
+                logger.debug(f"Reusing parsed {csv_file.name}")
+                return cached[1]
+
+            df = read_csv(csv_file)
+            self._frame_cache[str(csv_file)] = (signature, df)
+            logger.info(f"Loaded {csv_file.name}: {len(df)} rows")
+            return df
+        except Exception as e:
+            logger.error(f"Error loading {csv_file.name}: {e}")
+            return None
 
     def load_all_csv_files(self) -> Dict[str, pd.DataFrame]:
-        """Load all CSV files from the data directory."""
+        """Load all CSV files from the data directory.
+
+        Multiple files are parsed concurrently; pandas' C parser releases the GIL while tokenizing.
+        """
         csv_files = list(self.data_dir.glob("*.csv"))
         logger.info(f"Found {len(csv_files)} CSV files")
 
-        dataframes = {}
-        for csv_file in csv_files:
-            try:
-                df = pd.read_csv(csv_file)
-                dataframes[csv_file.stem] = df
-                logger.info(f"Loaded {csv_file.name}: {len(df)} rows")
-            except Exception as e:
-                logger.error(f"Error loading {csv_file.name}: {e}")
+        if len(csv_files) > 1:
+            with ThreadPoolExecutor(max_workers=min(self.MAX_LOAD_WORKERS, len(csv_files))) as executor:
+                frames = list(executor.map(self._load_csv_file, csv_files))
+        else:
+            frames = [self._load_csv_file(csv_file) for csv_file in csv_files]
 
-        return dataframes
+        # Drop cached frames for files that are no longer present
+        current = {str(csv_file) for csv_file in csv_files}
+        for path in [path for path in self._frame_cache if path not in current]:
+            del self._frame_cache[path]
+
+        return {csv_file.stem: df for csv_file, df in zip(csv_files, frames) if df is not None}
 
     def prepare_for_embedding(self, dataframes: Dict[str, pd.DataFrame]) -> List[Dict[str, Any]]:
         """Prepare data for OPEA embedding service."""
         documents = []
 
         for name, df in dataframes.items():
-            for idx, row in df.iterrows():
-                # Create a text representation of the row
-                text_parts = []
-                for col in df.columns:
-                    value = row[col]
-                    if pd.notna(value):
-                        text_parts.append(f"{col}: {value}")
-
-                doc_text = " | ".join(text_parts)
-
+            records = df.to_dict("records")
+            for (idx, doc_text), record in zip(iter_row_texts(df), records):
                 documents.append(
                     {
                         "id": f"{name}_{idx}",
                         "source": name,
                         "text": doc_text,
-                        "metadata": row.to_dict(),
+                        "metadata": record,
                     }
                 )
 
@@ -11,7 +11,8 @@ from typing import Any, Dict, List, Optional
 import httpx
 import pandas as pd
 
-from .llm_service import llm_service
+from .csv_processor import read_csv
+from .llm_service import extract_fenced_block, llm_service
 
 logger = logging.getLogger(__name__)
 
@@ -63,12 +64,16 @@ Summary:"""
             if summary_type == "bullet_points" and not summary.strip().startswith("•"):
                 summary = "• " + summary
 
+            # Count words once per text; each split() allocates a list of every token
+            original_length = len(text.split())
+            summary_length = len(summary.split())
+
             return {
                 "success": True,
-                "original_length": len(text.split()),
+                "original_length": original_length,
                 "summary": summary.strip(),
-                "summary_length": len(summary.split()),
-                "compression_ratio": round(len(summary.split()) / max(len(text.split()), 1), 2),
+                "summary_length": summary_length,
+                "compression_ratio": round(summary_length / max(original_length, 1), 2),
                 "type": summary_type,
             }
 
@@ -157,14 +162,7 @@ JSON:"""
             response = await llm_service.generate_text(prompt, temperature=0.1)
 
             # Parse JSON from response
-            if "```json" in response:
-                json_str = response.split("```json")[1].split("```")[0].strip()
-            elif "```" in response:
-                json_str = response.split("```")[1].strip()
-            else:
-                json_str = response.strip()
-
-            extracted = json.loads(json_str)
+            extracted = json.loads(extract_fenced_block(response))
 
             return {"success": True, "extracted_info": extracted}
 
@@ -175,7 +173,7 @@ JSON:"""
     async def summarize_csv_data(self, csv_path: str, sample_size: int = 100) -> Dict[str, Any]:
         """Summarize CSV file contents."""
         try:
-            df = pd.read_csv(csv_path)
+            df = read_csv(csv_path)
 
             # Get basic stats
             stats = {
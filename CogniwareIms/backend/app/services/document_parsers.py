@@ -0,0 +1,218 @@
+# Copyright (C) 2024 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+"""Document text extraction helpers.
+
+Kept free of the service stack (Redis, HTTP clients, knowledge base singletons) so PDF worker processes only import
+the parsing libraries.
+"""
+
+import logging
+import math
+import multiprocessing
+import os
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+try:
+    from pypdf import PdfReader
+except ImportError:
+    PdfReader = None
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
+logger = logging.getLogger(__name__)
+
+
+# PDFs with more pages than this are split across worker processes
+PDF_PARALLEL_PAGE_THRESHOLD = 200
+PDF_PAGES_PER_TASK = 100
+PDF_MAX_WORKERS = int(os.getenv("PDF_MAX_WORKERS", str(max(1, (os.cpu_count() or 1) // 2))))
+
+# Shared by every large PDF upload; created on first use and shut down with the application
+_pdf_executor: Optional[ProcessPoolExecutor] = None
+_pdf_executor_lock = threading.Lock()
+
+# PDFium is not thread-safe, even across separate documents; every pdfium call in a process runs under this lock
+_pdfium_lock = threading.Lock()
+
+
+def get_pdf_executor() -> ProcessPoolExecutor:
+    """Get or create the process pool used for parallel PDF page extraction."""
+    global _pdf_executor
+    # Extraction runs in worker threads, so two uploads may get here at once
+    with _pdf_executor_lock:
+        if _pdf_executor is None:
+            _pdf_executor = ProcessPoolExecutor(
+                max_workers=PDF_MAX_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pdf_executor
+
+
+def shutdown_pdf_executor():
+    """Stop the PDF worker processes, if they were started."""
+    global _pdf_executor
+    with _pdf_executor_lock:
+        executor, _pdf_executor = _pdf_executor, None
+    if executor is not None:
+        executor.shutdown(cancel_futures=True)
+
+
+@contextmanager
+def _open_pdf(file_path: str):
+    """Open a PDF with the native pdfium backend when installed, otherwise pypdf.
+
+    Yields (document, page_count). With pdfium, the process-wide pdfium lock is held until the document is closed,
+    so callers must do all page access inside the with block.
+    """
+    if pdfium is not None:
+        with _pdfium_lock:
+            document = pdfium.PdfDocument(file_path)
+            try:
+                yield document, len(document)
+            finally:
+                document.close()
+    else:
+        with open(file_path, "rb") as file:
+            pdf_reader = PdfReader(file)
+            yield pdf_reader, len(pdf_reader.pages)
+
+
+def _page_text(document, page_num: int) -> str:
+    """Extract the text of one page from a document opened by _open_pdf."""
+    if pdfium is not None:
+        page = document[page_num]
+        textpage = page.get_textpage()
+        try:
+            return textpage.get_text_range().replace("\r\n", "\n")
+        finally:
+            textpage.close()
+            page.close()
+    return document.pages[page_num].extract_text()
+
+
+def _extract_document_pages(document, start: int, stop: int) -> List[Tuple[int, str]]:
+    """Return (page_number, text) pairs for the non-empty pages in [start, stop)."""
+    pages = []
+    for page_num in range(start, stop):
+        text = _page_text(document, page_num)
+        if text.strip():  # Only keep non-empty pages
+            pages.append((page_num + 1, text))
+    return pages
+
+
+def _extract_pdf_page_range(file_path: str, start: int, stop: int) -> List[Tuple[int, str]]:
+    """Worker entry point: open the PDF independently and extract one page range."""
+    with _open_pdf(file_path) as (document, total_pages):
+        return _extract_document_pages(document, start, min(stop, total_pages))
+
+
+def extract_pdf_pages(file_path: str) -> Tuple[int, List[Tuple[int, str]]]:
+    """Extract text from each page of a PDF.
+
+    Returns the total page count and (page_number, text) pairs for non-empty pages. Large documents are split
+    into page ranges parsed in the shared worker pool; PDF handles can't be shared or pickled, so each worker
+    reopens the file.
+    """
+    with _open_pdf(file_path) as (document, total_pages):
+        tasks = math.ceil(total_pages / PDF_PAGES_PER_TASK)
+        if total_pages <= PDF_PARALLEL_PAGE_THRESHOLD or min(PDF_MAX_WORKERS, tasks) < 2:
+            return total_pages, _extract_document_pages(document, 0, total_pages)
+
+    executor = get_pdf_executor()
+    futures = [
+        executor.submit(_extract_pdf_page_range, file_path, start, start + PDF_PAGES_PER_TASK)
+        for start in range(0, total_pages, PDF_PAGES_PER_TASK)
+    ]
+    pages = [page for future in futures for page in future.result()]
+
+    logger.info(f"Extracted {total_pages} PDF pages in {len(futures)} tasks on the PDF worker pool")
+    return total_pages, pages
+
+
+_W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_W_BODY = _W_NS + "body"
+_W_P = _W_NS + "p"
+_W_R = _W_NS + "r"
+_W_HYPERLINK = _W_NS + "hyperlink"
+_W_BR_TYPE = _W_NS + "type"
+# Run content with a text equivalent; line breaks are handled separately since only text-wrapping ones count
+_DOCX_RUN_CHARS = {_W_NS + "tab": "\t", _W_NS + "ptab": "\t", _W_NS + "cr": "\n", _W_NS + "noBreakHyphen": "-"}
+_DOCX_TAGS = (_W_NS + "tbl", _W_P)
+
+
+def _docx_run_text(run) -> str:
+    """Return the text of a w:r element the way python-docx's Run.text does."""
+    parts = []
+    for child in run:
+        tag = child.tag
+        if tag == _W_NS + "t":
+            parts.append(child.text or "")
+        elif tag == _W_NS + "br":
+            if child.get(_W_BR_TYPE, "textWrapping") == "textWrapping":
+                parts.append("\n")
+        else:
+            char = _DOCX_RUN_CHARS.get(tag)
+            if char is not None:
+                parts.append(char)
+    return "".join(parts)
+
+
+def _docx_paragraph_text(paragraph) -> str:
+    """Return the text of a w:p element the way python-docx's Paragraph.text does.
+
+    Only runs that are direct children of the paragraph or of a hyperlink count, so tab-stop definitions in w:pPr
+    and paragraphs nested in text boxes never leak into the text.
+    """
+    parts = []
+    for child in paragraph.iterchildren(_W_R, _W_HYPERLINK):
+        if child.tag == _W_R:
+            parts.append(_docx_run_text(child))
+        else:
+            parts.extend(_docx_run_text(run) for run in child.iterchildren(_W_R))
+    return "".join(parts)
+
+
+def read_docx_paragraphs(file_path: Path) -> Optional[List[str]]:
+    """Stream body paragraph text from word/document.xml without building python-docx objects.
+
+    Matches python-docx's ``[p.text for p in Document(path).paragraphs]``. Returns None when lxml is missing, the
+    document contains tables (merged cells are left to python-docx) or it can't be read this way.
+    """
+    if etree is None:
+        return None
+
+    paragraphs = []
+
+    try:
+        with zipfile.ZipFile(file_path) as archive, archive.open("word/document.xml") as xml:
+            for _, elem in etree.iterparse(xml, events=("end",), tag=_DOCX_TAGS):
+                if elem.tag != _W_P:
+                    return None
+
+                # Paragraphs nested in tables, text boxes or content controls are not body paragraphs
+                parent = elem.getparent()
+                if parent is None or parent.tag != _W_BODY:
+                    continue
+
+                paragraphs.append(_docx_paragraph_text(elem))
+                # Free parsed paragraphs as we go
+                elem.clear()
+                while elem.getprevious() is not None:
+                    del parent[0]
+    except (KeyError, zipfile.BadZipFile, etree.XMLSyntaxError) as e:
+        logger.debug(f"DOCX fast path unavailable for {Path(file_path).name}: {e}")
+        return None
+
+    return paragraphs
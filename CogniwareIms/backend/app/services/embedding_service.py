@@ -2,10 +2,12 @@
 # SPDX-License-Identifier: Apache-2.0
 """OPEA Embedding Service Integration Handles text vectorization and embedding generation."""
 
+import asyncio
 import logging
 import os
+from collections import OrderedDict
 from functools import lru_cache
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 import httpx
 import numpy as np
@@ -20,37 +22,73 @@ class EmbeddingService:
         self.base_url = os.getenv("OPEA_EMBEDDING_URL", "http://embedding-service:6000")
         self.model_id = os.getenv("EMBEDDING_MODEL_ID", "BAAI/bge-base-en-v1.5")
         self.timeout = httpx.Timeout(30.0, connect=5.0)
-        self.cache = {}
+        self.cache_size = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+        self.cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self.http_client: Optional[httpx.AsyncClient] = None
+        # Embedding requests in flight, keyed by text, so concurrent callers share one request
+        self._inflight: Dict[str, "asyncio.Task[List[float]]"] = {}
+        # Upper bound on batch requests in flight at once from a single embed_batch call
+        self.max_concurrent_batches = int(os.getenv("EMBEDDING_MAX_CONCURRENT_BATCHES", "4"))
+
+    def get_http_client(self) -> httpx.AsyncClient:
+        """Get or create the shared HTTP client; reusing it keeps connections alive across calls."""
+        if self.http_client is None or self.http_client.is_closed:
+            self.http_client = httpx.AsyncClient(timeout=self.timeout)
+        return self.http_client
 
     async def embed_text(self, text: str) -> List[float]:
         """Generate embedding for a single text Uses OPEA embedding microservice."""
         # Check cache first
-        if text in self.cache:
+        cached = self.cache.get(text)
+        if cached is not None:
+            self.cache.move_to_end(text)
             logger.debug(f"Cache hit for text: {text[:50]}...")
-            return self.cache[text]
-
+            return cached
+
+        task = self._inflight.get(text)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_embedding(text))
+            self._inflight[text] = task
+            task.add_done_callback(lambda done: self._finish_inflight(text, done))
+        # Shield so one cancelled caller does not cancel the request others are waiting on
+        return await asyncio.shield(task)
+
+    def _finish_inflight(self, text: str, task: "asyncio.Task[List[float]]"):
+        """Drop a finished request from the in-flight table.
+
+        Its exception is retrieved here so asyncio doesn't log it as never retrieved when every waiter was cancelled.
+        """
+        if not task.cancelled():
+            task.exception()
+        if self._inflight.get(text) is task:
+            del self._inflight[text]
+
+    async def _fetch_embedding(self, text: str) -> List[float]:
+        """Request the embedding of one text from the service and cache it."""
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.base_url}/v1/embeddings",
-                    json={"input": text, "model": self.model_id},
-                )
-                response.raise_for_status()
-                result = response.json()
-
-                # Extract embedding from response
-                if "data" in result and len(result["data"]) > 0:
-                    embedding = result["data"][0]["embedding"]
-                elif "embedding" in result:
-                    embedding = result["embedding"]
-                else:
-                    raise ValueError("Invalid embedding response format")
-
-                # Cache the result
-                self.cache[text] = embedding
-                logger.info(f"Generated embedding for text: {text[:50]}...")
-
-                return embedding
+            client = self.get_http_client()
+            response = await client.post(
+                f"{self.base_url}/v1/embeddings",
+                json={"input": text, "model": self.model_id},
+            )
+            response.raise_for_status()
+            result = response.json()
+
+            # Extract embedding from response
+            if "data" in result and len(result["data"]) > 0:
+                embedding = result["data"][0]["embedding"]
+            elif "embedding" in result:
+                embedding = result["embedding"]
+            else:
+                raise ValueError("Invalid embedding response format")
+
+            # Cache the result, evicting the least recently used entry when full
+            self.cache[text] = embedding
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+            logger.info(f"Generated embedding for text: {text[:50]}...")
+
+            return embedding
 
         except httpx.HTTPError as e:
             logger.error(f"HTTP error calling embedding service: {e}")
@@ -60,45 +98,54 @@ class EmbeddingService:
             raise
 
     async def embed_batch(self, texts: List[str], batch_size: int = 32) -> List[List[float]]:
-        """Generate embeddings for multiple texts in batches More efficient for large datasets."""
-        embeddings = []
-
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i : i + batch_size]
-
-            try:
-                async with httpx.AsyncClient(timeout=self.timeout) as client:
-                    response = await client.post(
-                        f"{self.base_url}/v1/embeddings",
-                        json={"input": batch, "model": self.model_id},
-                    )
-                    response.raise_for_status()
-                    result = response.json()
-
-                    # Extract embeddings
-                    if "data" in result:
-                        batch_embeddings = [item["embedding"] for item in result["data"]]
-                    else:
-                        # Fallback: generate one by one
-                        batch_embeddings = []
-                        for text in batch:
-                            emb = await self.embed_text(text)
-                            batch_embeddings.append(emb)
-
-                    embeddings.extend(batch_embeddings)
-                    logger.info(f"Generated {len(batch_embeddings)} embeddings")
-
-            except Exception as e:
-                logger.error(f"Batch embedding failed for batch {i//batch_size}: {e}")
-                # Try individual embeddings as fallback
+        """Generate embeddings for multiple texts in batches More efficient for large datasets.
+
+        Up to max_concurrent_batches batch requests run at once; results keep the order of texts.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrent_batches)
+
+        async def embed_one_batch(i: int) -> List[List[float]]:
+            async with semaphore:
+                return await self._embed_batch_request(texts[i : i + batch_size], i // batch_size)
+
+        batches = await asyncio.gather(*(embed_one_batch(i) for i in range(0, len(texts), batch_size)))
+        return [embedding for batch_embeddings in batches for embedding in batch_embeddings]
+
+    async def _embed_batch_request(self, batch: List[str], batch_index: int) -> List[List[float]]:
+        """Embed one batch with a single request, falling back to per-text embedding on failure."""
+        try:
+            client = self.get_http_client()
+            response = await client.post(
+                f"{self.base_url}/v1/embeddings",
+                json={"input": batch, "model": self.model_id},
+            )
+            response.raise_for_status()
+            result = response.json()
+
+            # Extract embeddings
+            if "data" in result:
+                batch_embeddings = [item["embedding"] for item in result["data"]]
+            else:
+                # Fallback: generate one by one
+                batch_embeddings = []
                 for text in batch:
-                    try:
-                        emb = await self.embed_text(text)
-                        embeddings.append(emb)
-                    except:
-                        embeddings.append([0.0] * 768)  # Zero vector as last resort
+                    emb = await self.embed_text(text)
+                    batch_embeddings.append(emb)
 
-        return embeddings
+            logger.info(f"Generated {len(batch_embeddings)} embeddings")
+            return batch_embeddings
+
+        except Exception as e:
+            logger.error(f"Batch embedding failed for batch {batch_index}: {e}")
+            # Try individual embeddings as fallback
+            embeddings = []
+            for text in batch:
+                try:
+                    emb = await self.embed_text(text)
+                    embeddings.append(emb)
+                except:
+                    embeddings.append([0.0] * 768)  # Zero vector as last resort
+            return embeddings
 
     async def embed_documents(self, documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Embed a list of documents with metadata Returns documents with added embedding field."""
@@ -138,25 +185,39 @@ class EmbeddingService:
         # Generate candidate embeddings
         candidate_embeddings = await self.embed_batch(candidate_texts)
 
-        # Calculate similarities
-        similarities = []
-        for idx, (text, embedding) in enumerate(zip(candidate_texts, candidate_embeddings)):
-            similarity = self.cosine_similarity(tuple(query_embedding), tuple(embedding))
-            similarities.append({"text": text, "index": idx, "similarity": similarity})
+        if not candidate_texts:
+            return []
+
+        # Score all candidates with a single matrix-vector product
+        query = np.asarray(query_embedding, dtype=np.float32)
+        matrix = np.asarray(candidate_embeddings, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+        scores = np.divide(matrix @ query, norms, out=np.zeros(len(matrix), dtype=np.float32), where=norms != 0)
 
-        # Sort by similarity and return top k
-        similarities.sort(key=lambda x: x["similarity"], reverse=True)
-        return similarities[:top_k]
+        # Select the top k without sorting every score
+        k = min(top_k, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        return [{"text": candidate_texts[idx], "index": int(idx), "similarity": float(scores[idx])} for idx in top]
 
     async def health_check(self) -> bool:
         """Check if embedding service is available."""
         try:
-            async with httpx.AsyncClient(timeout=httpx.Timeout(5.0)) as client:
-                response = await client.get(f"{self.base_url}/v1/health_check")
-                return response.status_code == 200
+            client = self.get_http_client()
+            response = await client.get(f"{self.base_url}/v1/health_check", timeout=httpx.Timeout(5.0))
+            return response.status_code == 200
         except:
             return False
 
+    async def close(self):
+        """Close the shared HTTP client."""
+        if self.http_client is not None:
+            await self.http_client.aclose()
+            self.http_client = None
+
 
 # Global instance
 embedding_service = EmbeddingService()
@@ -3,12 +3,15 @@
 """File Upload Service Handles xlsx, csv, pdf, docx file uploads and processing for knowledge base Optimized for Intel
 Xeon processors."""
 
+import asyncio
 import hashlib
 import logging
 import os
+import uuid
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple, Union
 
 import pandas as pd
 
@@ -18,16 +21,13 @@ try:
 except ImportError:
     load_workbook = None
 
-try:
-    from pypdf import PdfReader
-except ImportError:
-    PdfReader = None
-
 try:
     from docx import Document
 except ImportError:
     Document = None
 
+from .csv_processor import iter_row_texts, read_csv
+from .document_parsers import PdfReader, extract_pdf_pages, pdfium, read_docx_paragraphs
 from .embedding_service import embedding_service
 from .knowledge_manager import knowledge_manager
 from .retrieval_service import retrieval_service
@@ -43,14 +43,31 @@ class FileUploadService:
 
     SUPPORTED_EXTENSIONS = {".csv", ".xlsx", ".pdf", ".docx"}
     MAX_FILE_SIZE = 100 * 1024 * 1024  # 100MB
+    PARSE_CACHE_SIZE = 32
+    CHUNK_SIZE = 1024 * 1024  # Copy buffer size for streamed uploads
+    BUFFER_POOL_SIZE = 4
+    MAX_CONCURRENT_UPLOADS = 4
+    PARSERS = {
+        ".csv": "parse_csv",
+        ".xlsx": "parse_xlsx",
+        ".pdf": "parse_pdf",
+        ".docx": "parse_docx",
+    }
 
     def __init__(self, upload_dir: str = "/app/uploads"):
         self.upload_dir = Path(upload_dir)
         self.upload_dir.mkdir(exist_ok=True, parents=True)
 
-        # Create subdirectories by type
-        for ext in self.SUPPORTED_EXTENSIONS:
-            (self.upload_dir / ext[1:]).mkdir(exist_ok=True, parents=True)
+        # (documents, stats) parsed from recent uploads, keyed by extension + content digest
+        self._parse_cache: "OrderedDict[str, Tuple[List[Dict[str, Any]], Dict[str, Any]]]" = OrderedDict()
+
+        # Copy buffers reused across streamed uploads
+        self._buffer_pool: List[bytearray] = []
+
+        # Create subdirectories by type, keeping their paths for reuse on every upload and listing
+        self._type_dirs: Dict[str, Path] = {ext[1:]: self.upload_dir / ext[1:] for ext in self.SUPPORTED_EXTENSIONS}
+        for type_dir in self._type_dirs.values():
+            type_dir.mkdir(exist_ok=True, parents=True)
 
     def validate_file(self, filename: str, file_size: int) -> tuple[bool, str]:
         """Validate uploaded file.
@@ -58,311 +75,325 @@ class FileUploadService:
         Returns:
             (is_valid, error_message)
         """
-        # Check size
-        if file_size > self.MAX_FILE_SIZE:
+        # Check extension first; it needs no I/O and rejects unsupported uploads before any bytes are handled
+        ext = Path(filename or "").suffix.lower()
+        if ext not in self.SUPPORTED_EXTENSIONS:
             return (
                 False,
-                f"File too large. Maximum size: {self.MAX_FILE_SIZE // (1024*1024)}MB",
+                f"Unsupported file type. Supported: {', '.join(self.SUPPORTED_EXTENSIONS)}",
             )
 
-        # Check extension
-        ext = Path(filename).suffix.lower()
-        if ext not in self.SUPPORTED_EXTENSIONS:
+        # Check size
+        if file_size > self.MAX_FILE_SIZE:
             return (
                 False,
-                f"Unsupported file type. Supported: {', '.join(self.SUPPORTED_EXTENSIONS)}",
+                f"File too large. Maximum size: {self.MAX_FILE_SIZE // (1024*1024)}MB",
             )
 
         return True, ""
 
-    async def save_file(self, filename: str, content: bytes) -> Path:
-        """Save uploaded file to disk.
-
-        Returns:
-            Path to saved file
-        """
-        # Generate unique filename
+    def _unique_path(self, filename: str, content_hash: str) -> Path:
+        """Build the storage path for an upload in its type subdirectory."""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        file_hash = hashlib.sha256(content).hexdigest()[:8]
         ext = Path(filename).suffix.lower()
         base_name = Path(filename).stem
 
-        unique_filename = f"{base_name}_{timestamp}_{file_hash}{ext}"
+        unique_filename = f"{base_name}_{timestamp}_{content_hash[:8]}{ext}"
+        return self._type_dirs[ext[1:]] / unique_filename
 
-        # Save to appropriate subdirectory
-        file_path = self.upload_dir / ext[1:] / unique_filename
+    def _spool_stream(self, source: BinaryIO, target: Path) -> Tuple[str, int]:
+        """Copy a binary file-like object to target through a pooled buffer.
 
-        with open(file_path, "wb") as f:
-            f.write(content)
+        Returns the SHA-256 hex digest and byte count. Copying stops once MAX_FILE_SIZE is exceeded.
+        """
+        try:
+            buffer = self._buffer_pool.pop()
+        except IndexError:
+            buffer = bytearray(self.CHUNK_SIZE)
 
-        logger.info(f"Saved file: {file_path}")
-        return file_path
+        view = memoryview(buffer)
+        readinto = getattr(source, "readinto", None)
+        digest = hashlib.sha256()
+        size = 0
 
-    async def process_csv(self, file_path: Path) -> Dict[str, Any]:
-        """Process CSV file and add to knowledge base."""
         try:
-            df = pd.read_csv(file_path)
+            with open(target, "wb") as f:
+                while size <= self.MAX_FILE_SIZE:
+                    if readinto is not None:
+                        chunk = view[: readinto(view)]
+                    else:
+                        chunk = source.read(self.CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    digest.update(chunk)
+                    f.write(chunk)
+        finally:
+            if len(self._buffer_pool) < self.BUFFER_POOL_SIZE:
+                self._buffer_pool.append(buffer)
+
+        return digest.hexdigest(), size
+
+    async def save_file(self, filename: str, content: bytes, content_hash: Optional[str] = None) -> Path:
+        """Save uploaded file to disk.
 
-            documents = []
-            for idx, row in df.iterrows():
-                # Create text representation
-                text_parts = [f"{col}: {row[col]}" for col in df.columns if pd.notna(row[col])]
-                text = " | ".join(text_parts)
+        Args:
+            filename: Original filename
+            content: File bytes
+            content_hash: SHA-256 hex digest of content, if already computed
 
-                documents.append(
-                    {
-                        "text": text,
-                        "metadata": {
-                            "source": "csv_upload",
-                            "filename": file_path.name,
-                            "row_index": idx,
-                            "uploaded_at": datetime.now().isoformat(),
-                            "file_type": "csv",
-                        },
-                    }
-                )
+        Returns:
+            Path to saved file
+        """
+        file_path = self._unique_path(filename, content_hash or hashlib.sha256(content).hexdigest())
 
-            # Add to knowledge base
-            result = await knowledge_manager.add_knowledge_batch(
-                documents=documents, source=f"csv_upload_{file_path.stem}"
-            )
+        # Write off the event loop so large files don't stall concurrent requests
+        await asyncio.to_thread(file_path.write_bytes, content)
 
-            return {
-                "success": True,
-                "file_type": "csv",
-                "filename": file_path.name,
-                "rows_processed": len(documents),
-                "documents_added": result.get("added", 0),
-                "total_documents": result.get("total_documents", 0),
+        logger.info(f"Saved file: {file_path}")
+        return file_path
+
+    def parse_csv(self, file_path: Path) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Parse a CSV file into one document per row."""
+        df = read_csv(file_path)
+
+        documents = [
+            {"text": text, "metadata": {"source": "csv_upload", "row_index": idx, "file_type": "csv"}}
+            for idx, text in iter_row_texts(df)
+        ]
+        return documents, {"rows_processed": len(documents)}
+
+    def parse_xlsx(self, file_path: Path) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Parse an XLSX workbook into one document per non-empty row."""
+        if load_workbook is None:
+            raise RuntimeError("openpyxl not installed. Run: pip install openpyxl")
+
+        # Load the workbook once for every sheet; pandas names empty and duplicate headers, drops blank rows and
+        # types each column, so rows read the same as CSV uploads
+        sheets = pd.read_excel(file_path, sheet_name=None)
+
+        all_documents = [
+            {
+                "text": text,
+                "metadata": {"source": "xlsx_upload", "sheet": sheet_name, "row_index": idx, "file_type": "xlsx"},
+            }
+            for sheet_name, df in sheets.items()
+            for idx, text in iter_row_texts(df)
+            if text
+        ]
+        return all_documents, {"sheets_processed": len(sheets), "rows_processed": len(all_documents)}
+
+    def parse_pdf(self, file_path: Path) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Parse a PDF into one document per non-empty page."""
+        if PdfReader is None and pdfium is None:
+            raise RuntimeError("pypdf not installed. Run: pip install pypdf>=4.0.0")
+
+        total_pages, pages = extract_pdf_pages(str(file_path))
+
+        documents = [
+            {
+                "text": text,
+                "metadata": {
+                    "source": "pdf_upload",
+                    "page": page_num,
+                    "total_pages": total_pages,
+                    "file_type": "pdf",
+                },
             }
+            for page_num, text in pages
+        ]
+        return documents, {"pages_processed": len(documents)}
 
-        except Exception as e:
-            logger.error(f"CSV processing error: {e}")
-            return {"success": False, "error": str(e), "file_type": "csv"}
+    def parse_docx(self, file_path: Path) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Parse a DOCX file into paragraph chunks plus one document per table."""
+        if Document is None:
+            raise RuntimeError("python-docx not installed. Run: pip install python-docx")
 
-    async def process_xlsx(self, file_path: Path) -> Dict[str, Any]:
-        """Process XLSX file and add to knowledge base."""
-        try:
-            if load_workbook is None:
-                return {
-                    "success": False,
-                    "error": "openpyxl not installed. Run: pip install openpyxl",
-                }
+        documents = []
 
-            # Read all sheets
-            excel_file = pd.ExcelFile(file_path)
-            all_documents = []
-
-            for sheet_name in excel_file.sheet_names:
-                df = pd.read_excel(file_path, sheet_name=sheet_name)
-
-                for idx, row in df.iterrows():
-                    text_parts = [f"{col}: {row[col]}" for col in df.columns if pd.notna(row[col])]
-                    text = " | ".join(text_parts)
-
-                    all_documents.append(
-                        {
-                            "text": text,
-                            "metadata": {
-                                "source": "xlsx_upload",
-                                "filename": file_path.name,
-                                "sheet": sheet_name,
-                                "row_index": idx,
-                                "uploaded_at": datetime.now().isoformat(),
-                                "file_type": "xlsx",
-                            },
-                        }
-                    )
+        # Stream paragraphs straight from the XML when possible; fall back to python-docx for tables
+        paragraphs = read_docx_paragraphs(file_path)
+        if paragraphs is None:
+            doc = Document(file_path)
+            paragraphs = [para.text for para in doc.paragraphs]
+            tables = doc.tables
+        else:
+            tables = []
 
-            # Add to knowledge base
-            result = await knowledge_manager.add_knowledge_batch(
-                documents=all_documents, source=f"xlsx_upload_{file_path.stem}"
-            )
+        # Process paragraphs
+        full_text = [text for text in paragraphs if text.strip()]
 
-            return {
-                "success": True,
-                "file_type": "xlsx",
-                "filename": file_path.name,
-                "sheets_processed": len(excel_file.sheet_names),
-                "rows_processed": len(all_documents),
-                "documents_added": result.get("added", 0),
-                "total_documents": result.get("total_documents", 0),
-            }
+        # Split into chunks (every 5 paragraphs or ~500 words)
+        chunk_size = 5
+        for i in range(0, len(full_text), chunk_size):
+            chunk = " ".join(full_text[i : i + chunk_size])
 
-        except Exception as e:
-            logger.error(f"XLSX processing error: {e}")
-            return {"success": False, "error": str(e), "file_type": "xlsx"}
+            if chunk.strip():
+                documents.append(
+                    {
+                        "text": chunk,
+                        "metadata": {"source": "docx_upload", "chunk": i // chunk_size + 1, "file_type": "docx"},
+                    }
+                )
 
-    async def process_pdf(self, file_path: Path) -> Dict[str, Any]:
-        """Process PDF file and add to knowledge base."""
-        try:
-            if PdfReader is None:
-                return {
-                    "success": False,
-                    "error": "pypdf not installed. Run: pip install pypdf>=4.0.0",
-                }
+        # Process tables
+        for table_idx, table in enumerate(tables):
+            table_text = []
+            for row in table.rows:
+                row_text = " | ".join([cell.text for cell in row.cells])
+                table_text.append(row_text)
 
-            documents = []
+            if table_text:
+                documents.append(
+                    {
+                        "text": "\n".join(table_text),
+                        "metadata": {"source": "docx_upload", "table": table_idx + 1, "file_type": "docx"},
+                    }
+                )
 
-            with open(file_path, "rb") as file:
-                pdf_reader = PdfReader(file)
-                total_pages = len(pdf_reader.pages)
+        return documents, {"chunks_processed": len(documents)}
 
-                for page_num in range(total_pages):
-                    page = pdf_reader.pages[page_num]
-                    text = page.extract_text()
+    async def _parse_cached(
+        self, parser_name: str, file_path: Path, cache_key: Optional[str]
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Parse a file, reusing the documents extracted from identical content earlier."""
+        if cache_key is not None:
+            cached = self._parse_cache.get(cache_key)
+            if cached is not None:
+                self._parse_cache.move_to_end(cache_key)
+                logger.info(f"Reusing parsed documents for {file_path.name}")
+                return cached
 
-                    if text.strip():  # Only add non-empty pages
-                        documents.append(
-                            {
-                                "text": text,
-                                "metadata": {
-                                    "source": "pdf_upload",
-                                    "filename": file_path.name,
-                                    "page": page_num + 1,
-                                    "total_pages": total_pages,
-                                    "uploaded_at": datetime.now().isoformat(),
-                                    "file_type": "pdf",
-                                },
-                            }
-                        )
+        # Parsing is blocking and CPU-bound; run it in a worker thread so concurrent uploads don't stall the loop
+        parsed = await asyncio.to_thread(getattr(self, parser_name), file_path)
 
-            # Add to knowledge base
-            result = await knowledge_manager.add_knowledge_batch(
-                documents=documents, source=f"pdf_upload_{file_path.stem}"
-            )
+        if cache_key is not None:
+            self._parse_cache[cache_key] = parsed
+            if len(self._parse_cache) > self.PARSE_CACHE_SIZE:
+                self._parse_cache.popitem(last=False)
 
-            return {
-                "success": True,
-                "file_type": "pdf",
-                "filename": file_path.name,
-                "pages_processed": len(documents),
-                "documents_added": result.get("added", 0),
-                "total_documents": result.get("total_documents", 0),
-            }
+        return parsed
 
-        except Exception as e:
-            logger.error(f"PDF processing error: {e}")
-            return {"success": False, "error": str(e), "file_type": "pdf"}
+    async def process_file(self, file_path: Path, cache_key: Optional[str] = None) -> Dict[str, Any]:
+        """Parse a saved file with the processor for its extension and add it to the knowledge base.
 
-    async def process_docx(self, file_path: Path) -> Dict[str, Any]:
-        """Process DOCX file and add to knowledge base."""
-        try:
-            if Document is None:
-                return {
-                    "success": False,
-                    "error": "python-docx not installed. Run: pip install python-docx",
-                }
+        Args:
+            file_path: Saved upload
+            cache_key: Extension + content digest; identical content skips re-parsing but is always indexed
+        """
+        ext = file_path.suffix.lower()
 
-            doc = Document(file_path)
-            documents = []
-
-            # Process paragraphs
-            full_text = []
-            for para in doc.paragraphs:
-                if para.text.strip():
-                    full_text.append(para.text)
-
-            # Split into chunks (every 5 paragraphs or ~500 words)
-            chunk_size = 5
-            for i in range(0, len(full_text), chunk_size):
-                chunk = " ".join(full_text[i : i + chunk_size])
-
-                if chunk.strip():
-                    documents.append(
-                        {
-                            "text": chunk,
-                            "metadata": {
-                                "source": "docx_upload",
-                                "filename": file_path.name,
-                                "chunk": i // chunk_size + 1,
-                                "uploaded_at": datetime.now().isoformat(),
-                                "file_type": "docx",
-                            },
-                        }
-                    )
+        parser_name = self.PARSERS.get(ext)
+        if parser_name is None:
+            return {"success": False, "error": f"No processor for file type: {ext}", "file_path": str(file_path)}
 
-            # Process tables
-            for table_idx, table in enumerate(doc.tables):
-                table_text = []
-                for row in table.rows:
-                    row_text = " | ".join([cell.text for cell in row.cells])
-                    table_text.append(row_text)
-
-                if table_text:
-                    documents.append(
-                        {
-                            "text": "\n".join(table_text),
-                            "metadata": {
-                                "source": "docx_upload",
-                                "filename": file_path.name,
-                                "table": table_idx + 1,
-                                "uploaded_at": datetime.now().isoformat(),
-                                "file_type": "docx",
-                            },
-                        }
-                    )
+        file_type = ext[1:]
+        try:
+            documents, stats = await self._parse_cached(parser_name, file_path, cache_key)
+
+            # Per-upload metadata is stamped here so cached documents never carry another upload's filename
+            uploaded_at = datetime.now().isoformat()
+            batch = [
+                {
+                    "text": document["text"],
+                    "metadata": {**document["metadata"], "filename": file_path.name, "uploaded_at": uploaded_at},
+                }
+                for document in documents
+            ]
 
             # Add to knowledge base
             result = await knowledge_manager.add_knowledge_batch(
-                documents=documents, source=f"docx_upload_{file_path.stem}"
+                documents=batch, source=f"{file_type}_upload_{file_path.stem}"
             )
 
             return {
                 "success": True,
-                "file_type": "docx",
+                "file_type": file_type,
                 "filename": file_path.name,
-                "chunks_processed": len(documents),
+                **stats,
                 "documents_added": result.get("added", 0),
                 "total_documents": result.get("total_documents", 0),
+                "file_path": str(file_path),
             }
 
         except Exception as e:
-            logger.error(f"DOCX processing error: {e}")
-            return {"success": False, "error": str(e), "file_type": "docx"}
-
-    async def process_file(self, file_path: Path) -> Dict[str, Any]:
-        """Route file to appropriate processor based on extension."""
-        ext = file_path.suffix.lower()
-
-        processors = {
-            ".csv": self.process_csv,
-            ".xlsx": self.process_xlsx,
-            ".pdf": self.process_pdf,
-            ".docx": self.process_docx,
-        }
+            logger.error(f"{file_type.upper()} processing error: {e}")
+            return {"success": False, "error": str(e), "file_type": file_type, "file_path": str(file_path)}
 
-        processor = processors.get(ext)
-        if processor is None:
-            return {"success": False, "error": f"No processor for file type: {ext}"}
-
-        return await processor(file_path)
-
-    async def upload_and_process(self, filename: str, content: bytes) -> Dict[str, Any]:
+    async def upload_and_process(self, filename: str, content: Union[bytes, BinaryIO]) -> Dict[str, Any]:
         """Complete upload and processing workflow.
 
         Args:
             filename: Original filename
-            content: File bytes
+            content: File bytes, or a binary file-like object that is streamed to disk in chunks
 
         Returns:
             Processing result with statistics
         """
+        if not isinstance(content, (bytes, bytearray, memoryview)):
+            return await self._upload_and_process_stream(filename, content)
+
         # Validate
         is_valid, error_msg = self.validate_file(filename, len(content))
         if not is_valid:
             return {"success": False, "error": error_msg}
 
+        # Content already parsed recently is indexed again without re-parsing
+        content_hash = hashlib.sha256(content).hexdigest()
+        cache_key = f"{Path(filename).suffix.lower()}:{content_hash}"
+
         # Save file
-        file_path = await self.save_file(filename, content)
+        file_path = await self.save_file(filename, content, content_hash=content_hash)
 
-        # Process file
-        result = await self.process_file(file_path)
+        return await self.process_file(file_path, cache_key)
 
-        # Add file path to result
-        result["file_path"] = str(file_path)
+    async def _upload_and_process_stream(self, filename: str, source: BinaryIO) -> Dict[str, Any]:
+        """Upload workflow for file-like input, hashed and written without holding the whole file in memory."""
+        # Size is unknown until the stream is read; reject unsupported types up front
+        is_valid, error_msg = self.validate_file(filename, 0)
+        if not is_valid:
+            return {"success": False, "error": error_msg}
 
-        return result
+        ext = Path(filename).suffix.lower()
+        part_path = self._type_dirs[ext[1:]] / f".{uuid.uuid4().hex}.part"
+
+        try:
+            content_hash, size = await asyncio.to_thread(self._spool_stream, source, part_path)
+
+            is_valid, error_msg = self.validate_file(filename, size)
+            if not is_valid:
+                return {"success": False, "error": error_msg}
+
+            file_path = self._unique_path(filename, content_hash)
+            part_path.replace(file_path)
+            logger.info(f"Saved file: {file_path}")
+        finally:
+            part_path.unlink(missing_ok=True)
+
+        return await self.process_file(file_path, f"{ext}:{content_hash}")
+
+    async def upload_and_process_many(
+        self, files: List[Tuple[str, Union[bytes, BinaryIO]]]
+    ) -> List[Dict[str, Any]]:
+        """Upload and process several files concurrently.
+
+        Args:
+            files: (filename, content) pairs, content as accepted by upload_and_process
+
+        Returns:
+            One processing result per file, in input order
+        """
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_UPLOADS)
+
+        async def upload_one(filename: str, content: Union[bytes, BinaryIO]) -> Dict[str, Any]:
+            async with semaphore:
+                try:
+                    return await self.upload_and_process(filename, content)
+                except Exception as e:
+                    logger.error(f"Upload error for {filename}: {e}")
+                    return {"success": False, "error": str(e), "filename": filename}
+
+        return list(await asyncio.gather(*(upload_one(filename, content) for filename, content in files)))
 
     def list_uploaded_files(self, file_type: Optional[str] = None) -> List[Dict[str, Any]]:
         """List all uploaded files."""
@@ -370,27 +401,38 @@ class FileUploadService:
 
         search_dirs = []
         if file_type:
-            search_dirs.append(self.upload_dir / file_type)
+            if file_type in self._type_dirs:
+                search_dirs.append(self._type_dirs[file_type])
         else:
-            for ext in self.SUPPORTED_EXTENSIONS:
-                search_dirs.append(self.upload_dir / ext[1:])
+            search_dirs.extend(self._type_dirs.values())
 
         for search_dir in search_dirs:
-            if search_dir.exists():
-                for file_path in search_dir.iterdir():
-                    if file_path.is_file():
-                        stat = file_path.stat()
-                        files.append(
+            try:
+                entries = os.scandir(search_dir)
+            except FileNotFoundError:
+                continue
+
+            with entries:
+                for entry in entries:
+                    # Skip in-progress streamed uploads; DirEntry.is_file() uses the cached d_type
+                    if entry.name.startswith(".") or not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                    files.append(
+                        (
+                            stat.st_ctime,
                             {
-                                "filename": file_path.name,
-                                "type": file_path.suffix[1:],
+                                "filename": entry.name,
+                                "type": os.path.splitext(entry.name)[1][1:],
                                 "size": stat.st_size,
                                 "uploaded_at": datetime.fromtimestamp(stat.st_ctime).isoformat(),
-                                "path": str(file_path),
-                            }
+                                "path": entry.path,
+                            },
                         )
+                    )
 
-        return sorted(files, key=lambda x: x["uploaded_at"], reverse=True)
+        files.sort(key=lambda item: item[0], reverse=True)
+        return [info for _, info in files]
 
 
 # Global instance
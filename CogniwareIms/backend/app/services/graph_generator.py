@@ -2,6 +2,7 @@
 # SPDX-License-Identifier: Apache-2.0
 """Graph Generation Service Generates data for charts and visualizations."""
 
+import copy
 import logging
 import random
 from datetime import datetime, timedelta
@@ -9,6 +10,108 @@ from typing import Any, Dict, List
 
 logger = logging.getLogger(__name__)
 
+# Static chart payloads, built once at import; each request gets its own deep copy so callers can't alter them
+_CATEGORIES = [
+    {"category": "Processors", "count": 436, "value": 261600, "percentage": 31},
+    {"category": "GPUs", "count": 45, "value": 1349955, "percentage": 3},
+    {"category": "Memory", "count": 523, "value": 156877, "percentage": 37},
+    {"category": "Storage", "count": 312, "value": 93600, "percentage": 22},
+    {"category": "Motherboards", "count": 89, "value": 44500, "percentage": 6},
+]
+
+_CATEGORY_DISTRIBUTION = {
+    "data": _CATEGORIES,
+    "total_items": sum(c["count"] for c in _CATEGORIES),
+    "total_value": sum(c["value"] for c in _CATEGORIES),
+    "chart_type": "pie",
+}
+
+_WAREHOUSES = [
+    {
+        "name": "San Jose",
+        "utilization": 78,
+        "capacity": 15000,
+        "items": 2847,
+        "categories": {
+            "Processors": 145,
+            "GPUs": 20,
+            "Memory": 180,
+            "Storage": 95,
+        },
+    },
+    {
+        "name": "Austin",
+        "utilization": 65,
+        "capacity": 12000,
+        "items": 1923,
+        "categories": {
+            "Processors": 120,
+            "GPUs": 15,
+            "Memory": 150,
+            "Storage": 80,
+        },
+    },
+    {
+        "name": "Portland",
+        "utilization": 82,
+        "capacity": 18000,
+        "items": 3456,
+        "categories": {
+            "Processors": 171,
+            "GPUs": 10,
+            "Memory": 193,
+            "Storage": 137,
+        },
+    },
+]
+
+_WAREHOUSE_COMPARISON = {
+    "data": _WAREHOUSES,
+    "chart_type": "bar",
+    "metrics": ["utilization", "items", "capacity"],
+}
+
+_METRICS = [
+    {
+        "name": "Inventory Turnover",
+        "value": 4.2,
+        "unit": "x",
+        "trend": "+12%",
+        "trend_direction": "up",
+        "description": "Times inventory sold and replaced",
+        "history": [3.8, 3.9, 4.0, 4.1, 4.2],
+    },
+    {
+        "name": "Order Fulfillment Rate",
+        "value": 96.8,
+        "unit": "%",
+        "trend": "+3.2%",
+        "trend_direction": "up",
+        "description": "Orders fulfilled on time",
+        "history": [94.2, 95.1, 95.8, 96.3, 96.8],
+    },
+    {
+        "name": "Average Delivery Time",
+        "value": 2.4,
+        "unit": "days",
+        "trend": "-0.3 days",
+        "trend_direction": "down",
+        "description": "Average time from order to delivery",
+        "history": [2.9, 2.7, 2.6, 2.5, 2.4],
+    },
+    {
+        "name": "Stock Accuracy",
+        "value": 99.2,
+        "unit": "%",
+        "trend": "+0.5%",
+        "trend_direction": "up",
+        "description": "Inventory count accuracy",
+        "history": [98.5, 98.7, 98.9, 99.0, 99.2],
+    },
+]
+
+_PERFORMANCE_METRICS = {"metrics": _METRICS, "chart_type": "kpi_cards"}
+
 
 class GraphGenerator:
     """Generate data structures for frontend charts and graphs."""
@@ -44,67 +147,11 @@ class GraphGenerator:
 
     async def generate_category_distribution(self) -> Dict[str, Any]:
         """Generate product category distribution for pie/bar charts."""
-        categories = [
-            {"category": "Processors", "count": 436, "value": 261600, "percentage": 31},
-            {"category": "GPUs", "count": 45, "value": 1349955, "percentage": 3},
-            {"category": "Memory", "count": 523, "value": 156877, "percentage": 37},
-            {"category": "Storage", "count": 312, "value": 93600, "percentage": 22},
-            {"category": "Motherboards", "count": 89, "value": 44500, "percentage": 6},
-        ]
-
-        return {
-            "data": categories,
-            "total_items": sum(c["count"] for c in categories),
-            "total_value": sum(c["value"] for c in categories),
-            "chart_type": "pie",
-        }
+        return copy.deepcopy(_CATEGORY_DISTRIBUTION)
 
     async def generate_warehouse_comparison(self) -> Dict[str, Any]:
         """Generate warehouse utilization comparison for bar charts."""
-        warehouses = [
-            {
-                "name": "San Jose",
-                "utilization": 78,
-                "capacity": 15000,
-                "items": 2847,
-                "categories": {
-                    "Processors": 145,
-                    "GPUs": 20,
-                    "Memory": 180,
-                    "Storage": 95,
-                },
-            },
-            {
-                "name": "Austin",
-                "utilization": 65,
-                "capacity": 12000,
-                "items": 1923,
-                "categories": {
-                    "Processors": 120,
-                    "GPUs": 15,
-                    "Memory": 150,
-                    "Storage": 80,
-                },
-            },
-            {
-                "name": "Portland",
-                "utilization": 82,
-                "capacity": 18000,
-                "items": 3456,
-                "categories": {
-                    "Processors": 171,
-                    "GPUs": 10,
-                    "Memory": 193,
-                    "Storage": 137,
-                },
-            },
-        ]
-
-        return {
-            "data": warehouses,
-            "chart_type": "bar",
-            "metrics": ["utilization", "items", "capacity"],
-        }
+        return copy.deepcopy(_WAREHOUSE_COMPARISON)
 
     async def generate_allocation_timeline(self, days: int = 14) -> Dict[str, Any]:
         """Generate allocation activity timeline."""
@@ -126,46 +173,7 @@ class GraphGenerator:
 
     async def generate_performance_metrics(self) -> Dict[str, Any]:
         """Generate KPI metrics for dashboard."""
-        metrics = [
-            {
-                "name": "Inventory Turnover",
-                "value": 4.2,
-                "unit": "x",
-                "trend": "+12%",
-                "trend_direction": "up",
-                "description": "Times inventory sold and replaced",
-                "history": [3.8, 3.9, 4.0, 4.1, 4.2],
-            },
-            {
-                "name": "Order Fulfillment Rate",
-                "value": 96.8,
-                "unit": "%",
-                "trend": "+3.2%",
-                "trend_direction": "up",
-                "description": "Orders fulfilled on time",
-                "history": [94.2, 95.1, 95.8, 96.3, 96.8],
-            },
-            {
-                "name": "Average Delivery Time",
-                "value": 2.4,
-                "unit": "days",
-                "trend": "-0.3 days",
-                "trend_direction": "down",
-                "description": "Average time from order to delivery",
-                "history": [2.9, 2.7, 2.6, 2.5, 2.4],
-            },
-            {
-                "name": "Stock Accuracy",
-                "value": 99.2,
-                "unit": "%",
-                "trend": "+0.5%",
-                "trend_direction": "up",
-                "description": "Inventory count accuracy",
-                "history": [98.5, 98.7, 98.9, 99.0, 99.2],
-            },
-        ]
-
-        return {"metrics": metrics, "chart_type": "kpi_cards"}
+        return copy.deepcopy(_PERFORMANCE_METRICS)
 
     async def generate_heatmap_data(self) -> Dict[str, Any]:
         """Generate heatmap data for warehouse activity."""
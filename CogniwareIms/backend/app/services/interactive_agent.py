@@ -4,6 +4,7 @@
 
 import json
 import logging
+import re
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
@@ -14,6 +15,23 @@ from .retrieval_service import retrieval_service
 
 logger = logging.getLogger(__name__)
 
+# Keywords that indicate database query, scanned in a single case-insensitive pass
+DB_QUERY_KEYWORDS = [
+    "how many",
+    "show me",
+    "list",
+    "count",
+    "total",
+    "inventory",
+    "stock",
+    "warehouse",
+    "allocation",
+    "available",
+    "in stock",
+    "quantity",
+]
+_DB_QUERY_PATTERN = re.compile("|".join(map(re.escape, DB_QUERY_KEYWORDS)), re.IGNORECASE)
+
 
 class InteractiveAgent:
     """Interactive conversational agent for inventory management Combines RAG, DBQnA, and chat capabilities."""
@@ -124,24 +142,7 @@ class InteractiveAgent:
 
     async def _is_database_query(self, message: str) -> bool:
         """Determine if message requires database query."""
-        # Keywords that indicate database query
-        db_keywords = [
-            "how many",
-            "show me",
-            "list",
-            "count",
-            "total",
-            "inventory",
-            "stock",
-            "warehouse",
-            "allocation",
-            "available",
-            "in stock",
-            "quantity",
-        ]
-
-        message_lower = message.lower()
-        return any(keyword in message_lower for keyword in db_keywords)
+        return _DB_QUERY_PATTERN.search(message) is not None
 
     async def _get_rag_context(self, query: str, top_k: int = 3) -> Optional[Dict[str, Any]]:
         """Get relevant context from knowledge base using RAG."""
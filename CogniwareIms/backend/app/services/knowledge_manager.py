@@ -3,31 +3,78 @@
 """Knowledge Base Manager Handles continuous learning and knowledge base updates Allows users to add new knowledge and
 retrain on combined old+new data."""
 
+import asyncio
+import itertools
 import json
 import logging
+import mmap
 import os
+import secrets
+import stat
+import tempfile
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
-import pandas as pd
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
+from .csv_processor import iter_row_texts, read_csv
 from .embedding_service import embedding_service
 from .retrieval_service import retrieval_service
 
 logger = logging.getLogger(__name__)
 
+# Per-process document ID sequence; the random start keeps IDs distinct across restarts
+_doc_id_counter = itertools.count(secrets.randbits(32))
+
+
+def _new_doc_id(source: str, timestamp: str) -> str:
+    """Build a unique document ID from its source and a creation timestamp."""
+    return f"{source}_{timestamp}_{next(_doc_id_counter):08x}"
+
+
+def _dumps_str(obj: Any) -> str:
+    """Serialize to a JSON str, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj)
+
+
+def _load_json_file(path: Path) -> Any:
+    """Parse a JSON file.
+
+    With orjson the file is memory-mapped and parsed straight from the mapped bytes, without an intermediate decoded
+    str copy.
+    """
+    with open(path, "rb") as f:
+        if orjson is None:
+            return json.load(f)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            return orjson.loads(view)
+
 
 class KnowledgeManager:
     """Manages knowledge base with continuous learning capabilities Users can add new documents/data and system retrains
     automatically."""
 
+    # Documents embedded and indexed per step of a batch import
+    INDEX_CHUNK_SIZE = 256
+    # Seconds to coalesce per-document history updates before writing them out
+    HISTORY_SAVE_DELAY = 5.0
+
     def __init__(self, data_dir: str = "../data"):
         self.data_dir = Path(data_dir)
         self.knowledge_dir = self.data_dir / "knowledge_base"
         self.knowledge_dir.mkdir(exist_ok=True, parents=True)
 
         self.history_file = self.knowledge_dir / "training_history.json"
+        self._history_save_handle: Optional[asyncio.TimerHandle] = None
+        self._history_save_task: Optional[asyncio.Task] = None
+        # Orders background history writes so an older snapshot never lands after a newer one
+        self._history_write_lock = asyncio.Lock()
         self.load_history()
 
     def load_history(self):
@@ -42,10 +89,73 @@ class KnowledgeManager:
                 "last_update": None,
             }
 
+    @staticmethod
+    def _write_file_atomic(path: Path, data: str):
+        """Write data to a temporary file next to path, then rename it over path.
+
+        An existing file keeps its permission bits; a new one gets mkstemp's 0600.
+        """
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            mode = None
+
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                if mode is not None:
+                    os.fchmod(f.fileno(), mode)
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _cancel_scheduled_save(self):
+        """Drop a pending coalesced save; the caller is about to write the history itself."""
+        if self._history_save_handle is not None:
+            self._history_save_handle.cancel()
+            self._history_save_handle = None
+
     def save_history(self):
         """Save training history."""
-        with open(self.history_file, "w") as f:
-            json.dump(self.history, f, indent=2)
+        self._cancel_scheduled_save()
+        self._write_file_atomic(self.history_file, json.dumps(self.history, indent=2))
+
+    async def save_history_async(self):
+        """Save training history, writing the file in a worker thread instead of on the event loop."""
+        self._cancel_scheduled_save()
+        # Serialize on the loop so the snapshot cannot change while the thread writes it
+        data = json.dumps(self.history, indent=2)
+        async with self._history_write_lock:
+            await asyncio.to_thread(self._write_file_atomic, self.history_file, data)
+
+    async def flush_history(self):
+        """Write the latest history before shutdown.
+
+        Cancels a pending coalesced save and waits for one already writing, so an older snapshot can't land after the
+        final write.
+        """
+        self._cancel_scheduled_save()
+        task, self._history_save_task = self._history_save_task, None
+        if task is not None and not task.done():
+            try:
+                await task
+            except Exception as e:
+                logger.error(f"Background history save failed: {e}")
+        await self.save_history_async()
+
+    def schedule_history_save(self):
+        """Save training history after HISTORY_SAVE_DELAY, coalescing updates made in the meantime."""
+        if self._history_save_handle is None:
+            self._history_save_handle = asyncio.get_running_loop().call_later(
+                self.HISTORY_SAVE_DELAY, self._run_scheduled_save
+            )
+
+    def _run_scheduled_save(self):
+        """Timer callback that starts the coalesced background save."""
+        self._history_save_handle = None
+        self._history_save_task = asyncio.get_running_loop().create_task(self.save_history_async())
 
     async def add_knowledge_from_text(
         self,
@@ -67,7 +177,7 @@ class KnowledgeManager:
         """
         try:
             # Generate unique document ID
-            doc_id = f"{source}_{datetime.now().strftime('%Y%m%d%H%M%S%f')}"
+            doc_id = _new_doc_id(source, datetime.now().strftime("%Y%m%d%H%M%S"))
 
             # Prepare metadata
             full_metadata = {
@@ -89,7 +199,7 @@ class KnowledgeManager:
                 # Update history
                 self.history["total_documents"] += 1
                 self.history["last_update"] = datetime.now().isoformat()
-                self.save_history()
+                self.schedule_history_save()
 
                 logger.info(f"Added knowledge document: {doc_id}")
 
@@ -109,46 +219,31 @@ class KnowledgeManager:
     async def add_knowledge_from_csv(self, csv_file: Path, auto_train: bool = True) -> Dict[str, Any]:
         """Add knowledge from CSV file Each row becomes a document in the knowledge base."""
         try:
-            df = pd.read_csv(csv_file)
-            added_count = 0
-
-            for idx, row in df.iterrows():
-                # Create text representation
-                text_parts = [f"{col}: {row[col]}" for col in df.columns if pd.notna(row[col])]
-                text = " | ".join(text_parts)
-
-                # Add to knowledge base
-                result = await self.add_knowledge_from_text(
-                    text=text,
-                    source=f"csv_{csv_file.stem}",
-                    metadata={
+            df = read_csv(csv_file)
+
+            records = df.to_dict("records")
+            documents = [
+                {
+                    "text": text,
+                    "metadata": {
+                        "added_by": "system",
                         "file": csv_file.name,
                         "row_index": idx,
-                        "raw_data": row.to_dict(),
+                        "raw_data": record,
                     },
-                    auto_train=False,  # Batch training at end
-                )
-
-                if result["success"]:
-                    added_count += 1
-
-            # Record training run
-            self.history["training_runs"].append(
-                {
-                    "timestamp": datetime.now().isoformat(),
-                    "source": f"csv_{csv_file.name}",
-                    "documents_added": added_count,
-                    "total_documents": self.history["total_documents"],
                 }
-            )
-            self.save_history()
+                for (idx, text), record in zip(iter_row_texts(df), records)
+            ]
 
-            logger.info(f"Added {added_count} documents from CSV: {csv_file.name}")
+            # Embed and index all rows as one batch, recorded as a single training run
+            result = await self.add_knowledge_batch(documents, source=f"csv_{csv_file.stem}")
+
+            logger.info(f"Added {result['added']} documents from CSV: {csv_file.name}")
 
             return {
                 "success": True,
-                "documents_added": added_count,
-                "total_documents": self.history["total_documents"],
+                "documents_added": result["added"],
+                "total_documents": result["total_documents"],
                 "file": csv_file.name,
             }
 
@@ -168,43 +263,51 @@ class KnowledgeManager:
         added_count = 0
         failed_count = 0
 
-        # Generate embeddings in batch (more efficient)
-        texts = [doc["text"] for doc in documents]
-        embeddings = await embedding_service.embed_batch(texts)
+        # One creation time for the whole import, formatted once rather than per document
+        started = datetime.now()
+        id_timestamp = started.strftime("%Y%m%d%H%M%S")
+        added_at = started.isoformat()
 
-        # Index all documents
-        for doc, embedding in zip(documents, embeddings):
-            doc_id = f"{source}_{datetime.now().strftime('%Y%m%d%H%M%S')}_{added_count}"
+        # Embed and index in fixed-size chunks so only one chunk of embeddings is held in memory
+        for start in range(0, len(documents), self.INDEX_CHUNK_SIZE):
+            chunk = documents[start : start + self.INDEX_CHUNK_SIZE]
 
-            success = await retrieval_service.index_document(
-                doc_id=doc_id,
-                text=doc["text"],
-                embedding=embedding,
-                metadata={
-                    "source": source,
-                    "added_at": datetime.now().isoformat(),
-                    **doc.get("metadata", {}),
-                },
-            )
+            # Generate embeddings in batch (more efficient)
+            embeddings = await embedding_service.embed_batch([doc["text"] for doc in chunk])
 
-            if success:
-                added_count += 1
-            else:
-                failed_count += 1
+            indexed_docs = [
+                {
+                    "id": _new_doc_id(source, id_timestamp),
+                    "text": doc["text"],
+                    "embedding": embedding,
+                    "metadata": {
+                        "source": source,
+                        "added_at": added_at,
+                        **doc.get("metadata", {}),
+                    },
+                }
+                for doc, embedding in zip(chunk, embeddings)
+            ]
+
+            # Index the whole chunk in one pipelined round trip
+            indexed = await retrieval_service.index_documents(indexed_docs)
+            added_count += indexed
+            failed_count += len(indexed_docs) - indexed
 
         # Update history
+        finished_at = datetime.now().isoformat()
         self.history["total_documents"] += added_count
-        self.history["last_update"] = datetime.now().isoformat()
+        self.history["last_update"] = finished_at
         self.history["training_runs"].append(
             {
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": finished_at,
                 "source": source,
                 "documents_added": added_count,
                 "documents_failed": failed_count,
                 "total_documents": self.history["total_documents"],
             }
         )
-        self.save_history()
+        await self.save_history_async()
 
         logger.info(f"Batch import: {added_count} added, {failed_count} failed")
 
@@ -260,7 +363,7 @@ class KnowledgeManager:
 
             if success:
                 self.history["total_documents"] -= 1
-                self.save_history()
+                self.schedule_history_save()
 
                 return {"success": True, "message": "Knowledge deleted successfully"}
             else:
@@ -323,7 +426,7 @@ class KnowledgeManager:
                     "total_documents": self.history["total_documents"],
                 }
             )
-            self.save_history()
+            await self.save_history_async()
 
             logger.info(f"Retraining complete: {success_count}/{len(documents)} documents")
 
@@ -354,22 +457,33 @@ class KnowledgeManager:
             return {"error": str(e)}
 
     async def export_knowledge_base(self, output_file: Optional[Path] = None) -> Path:
-        """Export entire knowledge base to JSON file."""
-        try:
-            documents = await retrieval_service.get_all_documents(limit=100000)
-
-            export_data = {
-                "exported_at": datetime.now().isoformat(),
-                "total_documents": len(documents),
-                "documents": documents,
-                "history": self.history,
-            }
+        """Export entire knowledge base to JSON file.
 
+        Documents are streamed from the vector store and written a batch at a time, so the export never holds the
+        whole knowledge base in memory.
+        """
+        try:
             if not output_file:
                 output_file = self.knowledge_dir / f"export_{datetime.now().strftime('%Y%m%d%H%M%S')}.json"
 
-            with open(output_file, "w") as f:
-                json.dump(export_data, f, indent=2)
+            f = await asyncio.to_thread(open, output_file, "w")
+            try:
+                header = f'{{"exported_at": {_dumps_str(datetime.now().isoformat())},\n"documents": ['
+                await asyncio.to_thread(f.write, header)
+
+                total_documents = 0
+                async for documents in retrieval_service.iter_documents():
+                    separator = ",\n" if total_documents else "\n"
+                    chunk = separator + ",\n".join(_dumps_str(doc) for doc in documents)
+                    await asyncio.to_thread(f.write, chunk)
+                    total_documents += len(documents)
+
+                await asyncio.to_thread(
+                    f.write,
+                    f'\n],\n"total_documents": {total_documents},\n"history": {_dumps_str(self.history)}}}\n',
+                )
+            finally:
+                await asyncio.to_thread(f.close)
 
             logger.info(f"Exported knowledge base to: {output_file}")
             return output_file
@@ -381,8 +495,7 @@ class KnowledgeManager:
     async def import_knowledge_base(self, import_file: Path) -> Dict[str, Any]:
         """Import knowledge base from JSON file."""
         try:
-            with open(import_file, "r") as f:
-                import_data = json.load(f)
+            import_data = _load_json_file(import_file)
 
             documents = import_data.get("documents", [])
 
@@ -5,12 +5,39 @@
 import json
 import logging
 import os
-from typing import Any, AsyncGenerator, Dict, List, Optional
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
 
 import httpx
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# Parser for streamed completion chunks; orjson.JSONDecodeError subclasses json.JSONDecodeError
+_loads_chunk = orjson.loads if orjson is not None else json.loads
+
+
+def extract_fenced_block(text: str, language: str = "json") -> str:
+    """Return the body of the first ```<language> (or bare ```) fence in an LLM response.
+
+    Falls back to the whole response when it contains no fence.
+    """
+    fence = f"```{language}"
+    start = text.find(fence)
+    if start != -1:
+        start += len(fence)
+    else:
+        start = text.find("```")
+        if start == -1:
+            return text.strip()
+        start += 3
+
+    end = text.find("```", start)
+    return (text[start:] if end == -1 else text[start:end]).strip()
+
 
 class LLMService:
     """Integration with OPEA LLM microservice for text generation."""
@@ -20,6 +47,15 @@ class LLMService:
         self.model_id = os.getenv("LLM_MODEL_ID", "Intel/neural-chat-7b-v3-3")
         self.timeout = httpx.Timeout(60.0, connect=10.0)
         self.max_tokens = int(os.getenv("MAX_TOTAL_TOKENS", "2048"))
+        self.http_client: Optional[httpx.AsyncClient] = None
+        # (schema, rendered SQL system prompt) for the most recently seen schema object
+        self._sql_prompt_cache: Optional[Tuple[Dict[str, Any], str]] = None
+
+    def get_http_client(self) -> httpx.AsyncClient:
+        """Get or create the shared HTTP client; reusing it keeps connections alive across calls."""
+        if self.http_client is None or self.http_client.is_closed:
+            self.http_client = httpx.AsyncClient(timeout=self.timeout)
+        return self.http_client
 
     async def chat_completion(
         self,
@@ -35,25 +71,25 @@ class LLMService:
             max_tokens: Maximum tokens to generate
         """
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                payload = {
-                    "model": self.model_id,
-                    "messages": messages,
-                    "temperature": temperature,
-                    "max_tokens": max_tokens or self.max_tokens,
-                }
-
-                response = await client.post(f"{self.base_url}/v1/chat/completions", json=payload)
-                response.raise_for_status()
-                result = response.json()
-
-                # Extract generated text
-                if "choices" in result and len(result["choices"]) > 0:
-                    return result["choices"][0]["message"]["content"]
-                elif "text" in result:
-                    return result["text"]
-                else:
-                    raise ValueError("Invalid LLM response format")
+            client = self.get_http_client()
+            payload = {
+                "model": self.model_id,
+                "messages": messages,
+                "temperature": temperature,
+                "max_tokens": max_tokens or self.max_tokens,
+            }
+
+            response = await client.post(f"{self.base_url}/v1/chat/completions", json=payload)
+            response.raise_for_status()
+            result = response.json()
+
+            # Extract generated text
+            if "choices" in result and len(result["choices"]) > 0:
+                return result["choices"][0]["message"]["content"]
+            elif "text" in result:
+                return result["text"]
+            else:
+                raise ValueError("Invalid LLM response format")
 
         except Exception as e:
             logger.error(f"Chat completion error: {e}")
@@ -96,9 +132,11 @@ Based on the context above, provide a detailed and accurate answer:"""
             natural_language_query: User's question in natural language
             schema: Database schema information
         """
-        schema_str = json.dumps(schema, indent=2)
+        # DBQnA passes the same cached schema dict on every call, so the prompt is rendered once per schema
+        if self._sql_prompt_cache is None or self._sql_prompt_cache[0] is not schema:
+            schema_str = json.dumps(schema, indent=2)
 
-        system_prompt = f"""You are an expert SQL generator. Given a database schema and a natural language question, generate a valid SQL query.
+            system_prompt = f"""You are an expert SQL generator. Given a database schema and a natural language question, generate a valid SQL query.
 
 Database Schema:
 {schema_str}
@@ -109,6 +147,8 @@ Rules:
 3. Include WHERE clauses for filtering
 4. Use aggregate functions (COUNT, SUM, AVG) when appropriate
 5. Return valid PostgreSQL syntax"""
+            self._sql_prompt_cache = (schema, system_prompt)
+        system_prompt = self._sql_prompt_cache[1]
 
         messages = [
             {"role": "system", "content": system_prompt},
@@ -119,10 +159,8 @@ Rules:
 
         # Clean up the response
         sql = sql.strip()
-        if sql.startswith("```sql"):
-            sql = sql.replace("```sql", "").replace("```", "").strip()
-        elif sql.startswith("```"):
-            sql = sql.replace("```", "").strip()
+        if sql.startswith("```"):
+            sql = extract_fenced_block(sql, "sql")
 
         return sql
 
@@ -150,14 +188,7 @@ Extract and return JSON format:
 
         try:
             # Try to parse JSON from response
-            if "```json" in response:
-                json_str = response.split("```json")[1].split("```")[0].strip()
-            elif "```" in response:
-                json_str = response.split("```")[1].strip()
-            else:
-                json_str = response
-
-            entities = json.loads(json_str)
+            entities = json.loads(extract_fenced_block(response))
             return entities if isinstance(entities, list) else []
         except Exception as e:
             logger.error(f"Entity extraction parsing error: {e}")
@@ -202,29 +233,29 @@ Insights:"""
     async def stream_chat(self, messages: List[Dict[str, str]], temperature: float = 0.7) -> AsyncGenerator[str, None]:
         """Stream chat responses (for real-time UI updates)"""
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                async with client.stream(
-                    "POST",
-                    f"{self.base_url}/v1/chat/completions",
-                    json={
-                        "model": self.model_id,
-                        "messages": messages,
-                        "temperature": temperature,
-                        "stream": True,
-                    },
-                ) as response:
-                    async for line in response.aiter_lines():
-                        if line.startswith("data: "):
-                            data = line[6:]
-                            if data != "[DONE]":
-                                try:
-                                    chunk = json.loads(data)
-                                    if "choices" in chunk and len(chunk["choices"]) > 0:
-                                        delta = chunk["choices"][0].get("delta", {})
-                                        if "content" in delta:
-                                            yield delta["content"]
-                                except json.JSONDecodeError:
-                                    continue
+            client = self.get_http_client()
+            async with client.stream(
+                "POST",
+                f"{self.base_url}/v1/chat/completions",
+                json={
+                    "model": self.model_id,
+                    "messages": messages,
+                    "temperature": temperature,
+                    "stream": True,
+                },
+            ) as response:
+                async for line in response.aiter_lines():
+                    if line.startswith("data: "):
+                        data = line[6:]
+                        if data != "[DONE]":
+                            try:
+                                chunk = _loads_chunk(data)
+                                if "choices" in chunk and len(chunk["choices"]) > 0:
+                                    delta = chunk["choices"][0].get("delta", {})
+                                    if "content" in delta:
+                                        yield delta["content"]
+                            except json.JSONDecodeError:
+                                continue
         except Exception as e:
             logger.error(f"Streaming error: {e}")
             yield f"Error: {str(e)}"
@@ -232,12 +263,18 @@ Insights:"""
     async def health_check(self) -> bool:
         """Check if LLM service is available."""
         try:
-            async with httpx.AsyncClient(timeout=httpx.Timeout(5.0)) as client:
-                response = await client.get(f"{self.base_url}/v1/health_check")
-                return response.status_code == 200
+            client = self.get_http_client()
+            response = await client.get(f"{self.base_url}/v1/health_check", timeout=httpx.Timeout(5.0))
+            return response.status_code == 200
         except:
             return False
 
+    async def close(self):
+        """Close the shared HTTP client."""
+        if self.http_client is not None:
+            await self.http_client.aclose()
+            self.http_client = None
+
 
 # Global instance
 llm_service = LLMService()
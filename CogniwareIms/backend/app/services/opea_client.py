@@ -4,6 +4,7 @@
 
 import logging
 import os
+import re
 from typing import Any, Dict, List, Optional
 
 import httpx
@@ -11,6 +12,9 @@ from fastapi import HTTPException
 
 logger = logging.getLogger(__name__)
 
+# Case-insensitive matcher for the predefined mock question
+_XEON_6_PATTERN = re.compile("xeon 6", re.IGNORECASE)
+
 
 class OPEAClient:
     """Client for OPEA GenAIComps microservices."""
@@ -87,7 +91,7 @@ class OPEAClient:
 
     def _get_mock_query_result(self, question: str) -> Dict[str, Any]:
         """Get mock query result when OPEA services are unavailable."""
-        if "xeon 6" in question.lower():
+        if _XEON_6_PATTERN.search(question):
             return {
                 "result": {
                     "product": "Intel Xeon 6 Processor",
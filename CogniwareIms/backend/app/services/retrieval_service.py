@@ -5,59 +5,139 @@
 import json
 import logging
 import os
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 import httpx
 import numpy as np
 import redis.asyncio as redis
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+_ORJSON_OPTIONS = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS) if orjson is not None else 0
+
+
+def _dumps(obj: Any) -> bytes:
+    """Serialize to JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=_ORJSON_OPTIONS)
+    return json.dumps(obj).encode("utf-8")
+
+
+def _loads(data: Any) -> Any:
+    """Deserialize JSON from bytes or str, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _doc_key(doc_id: Any) -> Any:
+    """Redis key of a stored document, for an ID as returned by Redis (bytes) or given by callers (str)."""
+    if isinstance(doc_id, bytes):
+        return b"doc:" + doc_id
+    return f"doc:{doc_id}"
+
 
 class RetrievalService:
     """Integration with OPEA Retrieval microservice and Redis vector store."""
 
+    # Documents fetched per MGET when loading many documents
+    MGET_BATCH_SIZE = 500
+
     def __init__(self):
         self.base_url = os.getenv("OPEA_RETRIEVAL_URL", "http://retrieval-service:7000")
         self.redis_url = os.getenv("REDIS_URL", "redis://redis:6379")
         self.timeout = httpx.Timeout(30.0, connect=5.0)
         self.redis_client = None
+        self.http_client: Optional[httpx.AsyncClient] = None
+
+    def get_http_client(self) -> httpx.AsyncClient:
+        """Get or create the shared HTTP client; reusing it keeps connections alive across calls."""
+        if self.http_client is None or self.http_client.is_closed:
+            self.http_client = httpx.AsyncClient(timeout=self.timeout)
+        return self.http_client
 
     async def get_redis_client(self):
         """Get or create Redis client."""
         if self.redis_client is None:
-            self.redis_client = await redis.from_url(self.redis_url, encoding="utf-8", decode_responses=False)
+            self.redis_client = await redis.from_url(
+                self.redis_url,
+                encoding="utf-8",
+                decode_responses=False,
+                max_connections=int(os.getenv("REDIS_MAX_CONNECTIONS", "50")),
+                health_check_interval=30,
+            )
         return self.redis_client
 
     async def index_document(self, doc_id: str, text: str, embedding: List[float], metadata: Dict[str, Any]) -> bool:
         """Index a document in the vector store."""
+        indexed = await self.index_documents(
+            [{"id": doc_id, "text": text, "embedding": embedding, "metadata": metadata}]
+        )
+        return indexed == 1
+
+    async def index_documents(self, documents: List[Dict[str, Any]]) -> int:
+        """Index many documents in a single Redis round trip.
+
+        Args:
+            documents: List of {"id": ..., "text": ..., "embedding": [...], "metadata": {...}}
+
+        Returns:
+            Number of documents indexed (all or none)
+        """
+        if not documents:
+            return 0
+
         try:
             # Store in Redis
             client = await self.get_redis_client()
+            # MULTI/EXEC: Redis applies the queued writes only once EXEC arrives, so a failure partway through
+            # leaves no partial keys and callers can safely retry the whole batch
+            pipe = client.pipeline(transaction=True)
 
-            doc_data = {
-                "id": doc_id,
-                "text": text,
-                "embedding": embedding,
-                "metadata": metadata,
-            }
+            for doc in documents:
+                doc_id = doc["id"]
+                doc_data = {
+                    "id": doc_id,
+                    "text": doc["text"],
+                    "embedding": doc["embedding"],
+                    "metadata": doc["metadata"],
+                }
 
-            # Store document
-            await client.set(f"doc:{doc_id}", json.dumps(doc_data))
+                # Store document
+                pipe.set(f"doc:{doc_id}", _dumps(doc_data))
 
-            # Store embedding separately for vector search
-            embedding_key = f"embedding:{doc_id}"
-            await client.set(embedding_key, json.dumps(embedding))
+                # Store embedding separately for vector search
+                pipe.set(f"embedding:{doc_id}", _dumps(doc["embedding"]))
 
             # Add to index
-            await client.sadd("document_ids", doc_id)
+            pipe.sadd("document_ids", *[doc["id"] for doc in documents])
 
-            logger.info(f"Indexed document: {doc_id}")
-            return True
+            await pipe.execute()
+
+            if len(documents) == 1:
+                logger.info(f"Indexed document: {documents[0]['id']}")
+            else:
+                logger.info(f"Indexed {len(documents)} documents")
+            return len(documents)
 
         except Exception as e:
-            logger.error(f"Error indexing document {doc_id}: {e}")
-            return False
+            logger.error(f"Error indexing {len(documents)} document(s): {e}")
+            return 0
+
+    async def _get_documents(self, client, doc_ids: List[Any]) -> List[Dict[str, Any]]:
+        """Load many documents with batched MGETs instead of one GET per document, skipping missing ones."""
+        documents = []
+        for start in range(0, len(doc_ids), self.MGET_BATCH_SIZE):
+            batch = doc_ids[start : start + self.MGET_BATCH_SIZE]
+            for doc_json in await client.mget([_doc_key(doc_id) for doc_id in batch]):
+                if doc_json:
+                    documents.append(_loads(doc_json))
+        return documents
 
     async def search(
         self,
@@ -68,19 +148,19 @@ class RetrievalService:
         """Semantic search using query embedding."""
         try:
             # Try OPEA retrieval service first
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.base_url}/v1/search",
-                    json={
-                        "embedding": query_embedding,
-                        "top_k": top_k,
-                        "filters": filters or {},
-                    },
-                )
-
-                if response.status_code == 200:
-                    result = response.json()
-                    return result.get("results", [])
+            client = self.get_http_client()
+            response = await client.post(
+                f"{self.base_url}/v1/search",
+                json={
+                    "embedding": query_embedding,
+                    "top_k": top_k,
+                    "filters": filters or {},
+                },
+            )
+
+            if response.status_code == 200:
+                result = response.json()
+                return result.get("results", [])
 
         except Exception as e:
             logger.warning(f"OPEA retrieval service unavailable, using direct Redis: {e}")
@@ -98,48 +178,47 @@ class RetrievalService:
             # Get all document IDs
             doc_ids = await client.smembers("document_ids")
 
-            # Calculate similarities
-            similarities = []
-            query_vec = np.array(query_embedding)
-
-            for doc_id in doc_ids:
-                # Get document
-                doc_json = await client.get(f"doc:{doc_id.decode() if isinstance(doc_id, bytes) else doc_id}")
-                if doc_json:
-                    doc = json.loads(doc_json)
-                    doc_embedding = np.array(doc.get("embedding", []))
-
-                    # Calculate cosine similarity
-                    if len(doc_embedding) > 0:
-                        similarity = np.dot(query_vec, doc_embedding) / (
-                            np.linalg.norm(query_vec) * np.linalg.norm(doc_embedding)
-                        )
-
-                        # Apply filters if any
-                        if filters:
-                            metadata = doc.get("metadata", {})
-                            if all(metadata.get(k) == v for k, v in filters.items()):
-                                similarities.append(
-                                    {
-                                        "doc_id": doc["id"],
-                                        "text": doc["text"],
-                                        "metadata": metadata,
-                                        "score": float(similarity),
-                                    }
-                                )
-                        else:
-                            similarities.append(
-                                {
-                                    "doc_id": doc["id"],
-                                    "text": doc["text"],
-                                    "metadata": doc.get("metadata", {}),
-                                    "score": float(similarity),
-                                }
-                            )
-
-            # Sort by similarity and return top k
-            similarities.sort(key=lambda x: x["score"], reverse=True)
-            return similarities[:top_k]
+            # Collect candidate documents, applying filters before any scoring
+            candidates = []
+            embeddings = []
+            query_vec = np.asarray(query_embedding, dtype=np.float32)
+
+            for doc in await self._get_documents(client, list(doc_ids)):
+                doc_embedding = doc.get("embedding") or []
+                if len(doc_embedding) != len(query_vec):
+                    continue
+
+                metadata = doc.get("metadata", {})
+                if filters and not all(metadata.get(k) == v for k, v in filters.items()):
+                    continue
+
+                candidates.append(doc)
+                embeddings.append(doc_embedding)
+
+            if not candidates:
+                return []
+
+            # Score every candidate with one matrix-vector product
+            matrix = np.asarray(embeddings, dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query_vec)
+            scores = np.divide(matrix @ query_vec, norms, out=np.zeros(len(matrix), dtype=np.float32), where=norms != 0)
+
+            # Select the top k without sorting every score
+            k = min(top_k, len(scores))
+            if k <= 0:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind="stable")]
+
+            return [
+                {
+                    "doc_id": candidates[idx]["id"],
+                    "text": candidates[idx]["text"],
+                    "metadata": candidates[idx].get("metadata", {}),
+                    "score": float(scores[idx]),
+                }
+                for idx in top
+            ]
 
         except Exception as e:
             logger.error(f"Redis search error: {e}")
@@ -176,7 +255,7 @@ class RetrievalService:
             doc_json = await client.get(f"doc:{doc_id}")
 
             if doc_json:
-                return json.loads(doc_json)
+                return _loads(doc_json)
             return None
 
         except Exception as e:
@@ -189,18 +268,40 @@ class RetrievalService:
             client = await self.get_redis_client()
             doc_ids = await client.smembers("document_ids")
 
-            documents = []
-            for i, doc_id in enumerate(list(doc_ids)[offset : offset + limit]):
-                doc = await self.get_document(doc_id.decode() if isinstance(doc_id, bytes) else doc_id)
-                if doc:
-                    documents.append(doc)
-
-            return documents
+            return await self._get_documents(client, list(doc_ids)[offset : offset + limit])
 
         except Exception as e:
             logger.error(f"Error getting documents: {e}")
             return []
 
+    async def iter_documents(self, batch_size: Optional[int] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield every indexed document in batches.
+
+        IDs are walked incrementally with SSCAN and each batch is loaded with one MGET, so neither the full ID set nor
+        all documents are held in memory at once.
+        """
+        batch_size = batch_size or self.MGET_BATCH_SIZE
+        client = await self.get_redis_client()
+
+        # SSCAN may return an ID more than once; only yield each document once
+        seen = set()
+        pending = []
+        async for doc_id in client.sscan_iter("document_ids", count=batch_size):
+            if doc_id in seen:
+                continue
+            seen.add(doc_id)
+            pending.append(doc_id)
+            if len(pending) >= batch_size:
+                documents = await self._get_documents(client, pending)
+                pending = []
+                if documents:
+                    yield documents
+
+        if pending:
+            documents = await self._get_documents(client, pending)
+            if documents:
+                yield documents
+
     async def count_documents(self) -> int:
         """Get total number of indexed documents."""
         try:
@@ -233,9 +334,9 @@ class RetrievalService:
 
         # Check OPEA service
         try:
-            async with httpx.AsyncClient(timeout=httpx.Timeout(5.0)) as client:
-                response = await client.get(f"{self.base_url}/v1/health_check")
-                status["opea_service"] = response.status_code == 200
+            client = self.get_http_client()
+            response = await client.get(f"{self.base_url}/v1/health_check", timeout=httpx.Timeout(5.0))
+            status["opea_service"] = response.status_code == 200
         except:
             pass
 
@@ -250,6 +351,15 @@ class RetrievalService:
 
         return status
 
+    async def close(self):
+        """Close the shared HTTP and Redis clients."""
+        if self.http_client is not None:
+            await self.http_client.aclose()
+            self.http_client = None
+        if self.redis_client is not None:
+            await self.redis_client.aclose()
+            self.redis_client = None
+
 
 # Global instance
 retrieval_service = RetrievalService()
@@ -0,0 +1,15 @@
+# Copyright (C) 2024 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Make the "app" package importable the same way the backend container runs it
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Service singletons create their data directories at import; keep them out of the source tree and /app
+_data_dir = tempfile.mkdtemp(prefix="cogniware-tests-")
+os.environ.setdefault("UPLOAD_DIR", os.path.join(_data_dir, "uploads"))
+os.environ.setdefault("CSV_DATA_DIR", os.path.join(_data_dir, "data"))
@@ -0,0 +1,67 @@
+# Copyright (C) 2024 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from app.services import csv_processor  # noqa: E402
+from app.services.csv_processor import iter_row_texts, read_csv  # noqa: E402
+
+DATED_CSV = """sku,received,updated_at,cutoff,quantity,price,active,note
+CPU-XN6-2024,2024-01-05,2024-01-05 10:30:00,10:30,12,599.99,true,
+GPU-H100-2024,2024-02-10,2024-02-10T11:00:00,11:00,,29999.5,false,backorder
+"""
+
+PLAIN_CSV = """sku,quantity,price
+CPU-XN6-2024,12,599.99
+RAM-DD5-64,,299.99
+"""
+
+
+def _write(tmp_path, content):
+    path = tmp_path / "inventory.csv"
+    path.write_text(content)
+    return path
+
+
+def test_read_csv_defaults_to_default_parser(tmp_path, monkeypatch):
+    monkeypatch.setattr(csv_processor, "CSV_ENGINE", None)
+    path = _write(tmp_path, DATED_CSV)
+
+    df = read_csv(path)
+    expected = pd.read_csv(path, engine="c")
+
+    assert list(iter_row_texts(df)) == list(iter_row_texts(expected))
+    pd.testing.assert_frame_equal(df, expected)
+
+
+def test_read_csv_pyarrow_opt_in_matches_default_parser_without_dates(tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    monkeypatch.setattr(csv_processor, "CSV_ENGINE", "pyarrow")
+    path = _write(tmp_path, PLAIN_CSV)
+
+    df = read_csv(path)
+    expected = pd.read_csv(path, engine="c")
+
+    assert list(iter_row_texts(df)) == list(iter_row_texts(expected))
+    pd.testing.assert_frame_equal(df, expected)
+
+
+def test_read_csv_falls_back_on_options_pyarrow_rejects(tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    monkeypatch.setattr(csv_processor, "CSV_ENGINE", "pyarrow")
+    path = _write(tmp_path, PLAIN_CSV)
+
+    pd.testing.assert_frame_equal(read_csv(path, low_memory=False), pd.read_csv(path, engine="c", low_memory=False))
+
+
+def test_iter_row_texts_keeps_integer_columns_integral():
+    df = pd.DataFrame({"sku": ["CPU-XN6-2024", "RAM-DD5-64"], "qty": [5, 3], "price": [599.99, None]})
+
+    assert list(iter_row_texts(df)) == [
+        (0, "sku: CPU-XN6-2024 | qty: 5 | price: 599.99"),
+        (1, "sku: RAM-DD5-64 | qty: 3"),
+    ]
+    # iterrows upcast each row to a common dtype, rendering the same quantity as "5.0"
+    assert "qty: 5.0" in " | ".join(f"{col}: {value}" for col, value in df[["qty", "price"]].iloc[0].items())
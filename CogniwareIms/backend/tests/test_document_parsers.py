@@ -0,0 +1,87 @@
+# Copyright (C) 2024 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import pytest
+
+docx = pytest.importorskip("docx")
+etree = pytest.importorskip("lxml.etree")
+
+from app.services.document_parsers import read_docx_paragraphs  # noqa: E402
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+# A floating text box as Word writes it: the DrawingML shape in mc:Choice, repeated as VML in mc:Fallback
+TEXT_BOX_RUN = f"""
+<w:r xmlns:w="{W_NS}"
+     xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006"
+     xmlns:wp="http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing"
+     xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main"
+     xmlns:wps="http://schemas.microsoft.com/office/word/2010/wordprocessingShape"
+     xmlns:v="urn:schemas-microsoft-com:vml">
+  <mc:AlternateContent>
+    <mc:Choice Requires="wps">
+      <w:drawing>
+        <wp:anchor>
+          <a:graphic>
+            <a:graphicData uri="http://schemas.microsoft.com/office/word/2010/wordprocessingShape">
+              <wps:wsp>
+                <wps:txbx>
+                  <w:txbxContent>
+                    <w:p><w:r><w:t>Boxed note</w:t></w:r></w:p>
+                  </w:txbxContent>
+                </wps:txbx>
+              </wps:wsp>
+            </a:graphicData>
+          </a:graphic>
+        </wp:anchor>
+      </w:drawing>
+    </mc:Choice>
+    <mc:Fallback>
+      <w:pict>
+        <v:shape>
+          <v:textbox>
+            <w:txbxContent>
+              <w:p><w:r><w:t>Boxed note</w:t></w:r></w:p>
+            </w:txbxContent>
+          </v:textbox>
+        </v:shape>
+      </w:pict>
+    </mc:Fallback>
+  </mc:AlternateContent>
+</w:r>
+"""
+
+
+def test_read_docx_paragraphs_matches_python_docx(tmp_path):
+    document = docx.Document()
+
+    tabbed = document.add_paragraph("SKU\tQuantity")
+    tabbed.paragraph_format.tab_stops.add_tab_stop(docx.shared.Inches(1))
+    tabbed.paragraph_format.tab_stops.add_tab_stop(docx.shared.Inches(3))
+
+    boxed = document.add_paragraph("Before box ")
+    boxed._p.append(etree.fromstring(TEXT_BOX_RUN))
+    boxed.add_run("after box")
+
+    lines = document.add_paragraph("first line")
+    lines.add_run().add_break()
+    lines.add_run("second line")
+    lines.add_run().add_break(docx.enum.text.WD_BREAK.PAGE)
+
+    path = tmp_path / "sample.docx"
+    document.save(path)
+
+    expected = [paragraph.text for paragraph in docx.Document(path).paragraphs]
+    assert expected == ["SKU\tQuantity", "Before box after box", "first line\nsecond line"]
+    assert read_docx_paragraphs(path) == expected
+
+
+def test_read_docx_paragraphs_leaves_tables_to_python_docx(tmp_path):
+    document = docx.Document()
+    document.add_paragraph("Intro")
+    document.add_table(rows=1, cols=2).cell(0, 0).text = "cell"
+
+    path = tmp_path / "table.docx"
+    document.save(path)
+
+    assert read_docx_paragraphs(path) is None
@@ -0,0 +1,50 @@
+# Copyright (C) 2024 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import asyncio
+import json
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+pytest.importorskip("numpy")
+
+from app.services.embedding_service import EmbeddingService  # noqa: E402
+
+
+@pytest.fixture
+def service():
+    """An EmbeddingService whose HTTP client answers locally and records each requested text."""
+    requested = []
+
+    def handler(request):
+        text = json.loads(request.content)["input"]
+        requested.append(text)
+        return httpx.Response(200, json={"data": [{"embedding": [float(len(text))]}]})
+
+    service = EmbeddingService()
+    service.cache_size = 2
+    service.http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    service.requested = requested
+    return service
+
+
+def test_embed_text_cache_evicts_least_recently_used(service):
+    async def run():
+        for text in ("a", "bb", "a", "ccc", "a", "bb"):
+            await service.embed_text(text)
+
+    asyncio.run(run())
+
+    # "a" was refreshed by its hits, so "bb" was evicted when "ccc" arrived
+    assert service.requested == ["a", "bb", "ccc", "bb"]
+    assert list(service.cache) == ["a", "bb"]
+
+
+def test_concurrent_embed_text_shares_one_request(service):
+    async def run():
+        return await asyncio.gather(*(service.embed_text("same") for _ in range(5)))
+
+    assert asyncio.run(run()) == [[4.0]] * 5
+    assert service.requested == ["same"]
+    assert service._inflight == {}
@@ -0,0 +1,54 @@
+# Copyright (C) 2024 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import datetime
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+openpyxl = pytest.importorskip("openpyxl")
+pytest.importorskip("httpx")
+pytest.importorskip("redis")
+
+from app.services.file_upload_service import FileUploadService  # noqa: E402
+
+
+def _pandas_rows(path):
+    """Row text and metadata as the original pd.read_excel + iterrows implementation produced them."""
+    rows = []
+    excel_file = pd.ExcelFile(path)
+    for sheet_name in excel_file.sheet_names:
+        df = pd.read_excel(path, sheet_name=sheet_name)
+        for idx, row in df.iterrows():
+            text = " | ".join(f"{col}: {row[col]}" for col in df.columns if pd.notna(row[col]))
+            rows.append((sheet_name, idx, text))
+    return rows
+
+
+def test_parse_xlsx_matches_pandas(tmp_path):
+    workbook = openpyxl.Workbook()
+    stock = workbook.active
+    stock.title = "Stock"
+    stock.append(["sku", "qty", "qty", None, "received"])
+    stock.append(["CPU-XN6-2024", 5, 7, "rack A", datetime.datetime(2024, 1, 5)])
+    stock.append([None, None, None, None, None])
+    stock.append(["GPU-H100-2024", None, 2.5, None, datetime.datetime(2024, 2, 10, 11, 0)])
+    stock.append(["RAM-DD5-64", 3, 1, "rack C", None])
+
+    warehouses = workbook.create_sheet("Warehouses")
+    warehouses.append(["name", "capacity", "active"])
+    warehouses.append(["San Jose", 15000, True])
+    warehouses.append(["Austin", 12000, False])
+
+    workbook.create_sheet("Empty")
+
+    path = tmp_path / "inventory.xlsx"
+    workbook.save(path)
+
+    documents, stats = FileUploadService(str(tmp_path / "uploads")).parse_xlsx(path)
+
+    parsed = [(doc["metadata"]["sheet"], doc["metadata"]["row_index"], doc["text"]) for doc in documents]
+    # Blank rows keep their place in row_index but produce no document
+    assert parsed == [row for row in _pandas_rows(path) if row[2]]
+    assert parsed[1] == ("Stock", 2, "sku: GPU-H100-2024 | qty.1: 2.5 | received: 2024-02-10 11:00:00")
+    assert stats == {"sheets_processed": 3, "rows_processed": 5}
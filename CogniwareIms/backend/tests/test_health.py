@@ -0,0 +1,50 @@
+# Copyright (C) 2024 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("sqlalchemy")
+
+from app import main  # noqa: E402
+
+
+@pytest.fixture
+def probes(monkeypatch):
+    """Replace every service health check with a slow counting probe."""
+    state = {"calls": 0, "healthy": True}
+
+    async def probe():
+        state["calls"] += 1
+        await asyncio.sleep(0.01)
+        return state["healthy"]
+
+    for service in (main.embedding_service, main.retrieval_service, main.llm_service, main.dbqna_service):
+        monkeypatch.setattr(service, "health_check", probe)
+    monkeypatch.setattr(main, "_health_cache", None)
+    monkeypatch.setattr(main, "_health_lock", asyncio.Lock())
+    return state
+
+
+def test_concurrent_health_checks_probe_services_once(probes):
+    async def run():
+        return await asyncio.gather(*(main.health_check() for _ in range(10)))
+
+    reports = asyncio.run(run())
+
+    assert probes["calls"] == 4
+    assert all(report["status"] == "healthy" for report in reports)
+
+    asyncio.run(main.health_check())
+    assert probes["calls"] == 4
+
+
+def test_degraded_health_report_is_not_cached(probes):
+    probes["healthy"] = False
+    assert asyncio.run(main.health_check())["status"] == "degraded"
+
+    probes["healthy"] = True
+    assert asyncio.run(main.health_check())["status"] == "healthy"
+    assert probes["calls"] == 8
@@ -0,0 +1,41 @@
+# Copyright (C) 2024 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("sqlalchemy")
+
+from app import main  # noqa: E402
+from fastapi import HTTPException  # noqa: E402
+
+
+def test_upload_knowledge_files_rejects_empty_batch():
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(main.upload_knowledge_files(files=[]))
+
+    assert exc_info.value.status_code == 400
+
+
+def test_upload_csv_route_delegates_to_upload_file(monkeypatch):
+    calls = []
+
+    async def upload_and_process(filename, content):
+        calls.append((filename, content))
+        return {"success": True, "filename": filename}
+
+    monkeypatch.setattr(main.file_upload_service, "upload_and_process", upload_and_process)
+
+    class Upload:
+        filename = "inventory.csv"
+        file = object()
+
+    result = asyncio.run(main.upload_csv_knowledge(Upload()))
+
+    assert result == {"success": True, "filename": "inventory.csv"}
+    assert calls == [("inventory.csv", Upload.file)]
+    routes = {route.path: route.endpoint for route in main.app.routes if hasattr(route, "endpoint")}
+    assert routes["/api/knowledge/upload-csv"] is main.upload_csv_knowledge
+    assert routes["/api/knowledge/upload-file"] is main.upload_knowledge_file
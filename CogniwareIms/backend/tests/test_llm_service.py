@@ -0,0 +1,40 @@
+# Copyright (C) 2024 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import pytest
+
+pytest.importorskip("httpx")
+
+from app.services.llm_service import extract_fenced_block  # noqa: E402
+
+
+def _split_fenced_block(response):
+    """The split-based JSON extraction extract_fenced_block replaced."""
+    if "```json" in response:
+        return response.split("```json")[1].split("```")[0].strip()
+    elif "```" in response:
+        return response.split("```")[1].strip()
+    return response.strip()
+
+
+@pytest.mark.parametrize(
+    "response",
+    [
+        'Here you go:\n```json\n{"sku": "CPU-XN6"}\n```\nDone.',
+        '```\n{"sku": "CPU-XN6"}\n```',
+        'Intro ```python\nprint()\n``` then ```json\n{"a": 1}\n```',
+        '```json\n{"unterminated": true}',
+        '  {"sku": "no fence"}  ',
+        "",
+    ],
+)
+def test_extract_fenced_block_matches_split_extraction(response):
+    assert extract_fenced_block(response) == _split_fenced_block(response)
+
+
+def test_extract_fenced_block_with_language_tag():
+    response = "```sql\nSELECT * FROM inventory\n```"
+
+    assert extract_fenced_block(response, "sql") == "SELECT * FROM inventory"
+    assert extract_fenced_block("```\nSELECT 1\n```", "sql") == "SELECT 1"
+    assert extract_fenced_block("SELECT 1", "sql") == "SELECT 1"
@@ -0,0 +1,146 @@
+# Copyright (C) 2024 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import time
+from collections import OrderedDict
+from types import SimpleNamespace
+
+import pytest
+
+jwt = pytest.importorskip("jwt")
+pytest.importorskip("passlib")
+
+from app.core import security  # noqa: E402
+from app.core.security import SecurityManager  # noqa: E402
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Drive the security module's time.time() and time.monotonic() from a settable value."""
+    # Start at the real time: jwt.decode checks exp against its own clock
+    state = {"now": time.time()}
+    monkeypatch.setattr(security, "time", SimpleNamespace(time=lambda: state["now"], monotonic=lambda: state["now"]))
+    return state
+
+
+@pytest.fixture
+def token_decodes(monkeypatch):
+    """Count real JWT decodes on an empty token cache."""
+    decodes = []
+    decode = jwt.decode
+
+    def counting_decode(token, *args, **kwargs):
+        decodes.append(token)
+        return decode(token, *args, **kwargs)
+
+    monkeypatch.setattr(security.jwt, "decode", counting_decode)
+    monkeypatch.setattr(security, "_token_cache", OrderedDict())
+    return decodes
+
+
+def _token(subject, exp):
+    return jwt.encode({"sub": subject, "exp": exp}, security._SECRET_KEY_BYTES, algorithm=security.ALGORITHM)
+
+
+@pytest.fixture
+def api_key_checks(monkeypatch):
+    """Count bcrypt verifications, accepting keys of the form "key-<hash>"."""
+    checks = []
+
+    def verify(api_key, hashed_key):
+        checks.append(api_key)
+        return api_key == f"key-{hashed_key}"
+
+    monkeypatch.setattr(security.pwd_context, "verify", verify)
+    monkeypatch.setattr(security, "_api_key_cache", OrderedDict())
+    return checks
+
+
+def test_api_key_cache_skips_hash_until_ttl(api_key_checks, clock, monkeypatch):
+    monkeypatch.setattr(security, "API_KEY_CACHE_TTL", 60)
+
+    assert SecurityManager.verify_api_key("key-a", "a")
+    assert SecurityManager.verify_api_key("key-a", "a")
+    assert api_key_checks == ["key-a"]
+
+    clock["now"] += 61
+    assert SecurityManager.verify_api_key("key-a", "a")
+    assert api_key_checks == ["key-a", "key-a"]
+
+    # Failed checks are never cached
+    assert not SecurityManager.verify_api_key("wrong", "a")
+    assert not SecurityManager.verify_api_key("wrong", "a")
+    assert api_key_checks.count("wrong") == 2
+
+
+def test_api_key_cache_evicts_least_recently_used(api_key_checks, clock, monkeypatch):
+    monkeypatch.setattr(security, "API_KEY_CACHE_SIZE", 2)
+
+    SecurityManager.verify_api_key("key-a", "a")
+    SecurityManager.verify_api_key("key-b", "b")
+    SecurityManager.verify_api_key("key-a", "a")  # hit keeps "a" hot
+    SecurityManager.verify_api_key("key-c", "c")  # evicts "b"
+    api_key_checks.clear()
+
+    SecurityManager.verify_api_key("key-a", "a")
+    SecurityManager.verify_api_key("key-b", "b")
+    assert api_key_checks == ["key-b"]
+
+
+def test_token_cache_holds_payload_until_ttl(token_decodes, clock, monkeypatch):
+    monkeypatch.setattr(security, "TOKEN_CACHE_TTL", 60)
+    exp = int(clock["now"]) + 3600
+    token = _token("a@example.com", exp)
+
+    payload = SecurityManager.verify_token(token)
+    payload["role"] = "mutated"
+    assert SecurityManager.verify_token(token) == {"sub": "a@example.com", "exp": exp}
+    assert len(token_decodes) == 1
+
+    clock["now"] += 61
+    SecurityManager.verify_token(token)
+    assert len(token_decodes) == 2
+
+
+def test_token_cache_entry_ends_at_token_expiry(token_decodes, clock, monkeypatch):
+    monkeypatch.setattr(security, "TOKEN_CACHE_TTL", 3600)
+    exp = int(clock["now"]) + 30
+    token = _token("a@example.com", exp)
+
+    SecurityManager.verify_token(token)
+    SecurityManager.verify_token(token)
+    assert len(token_decodes) == 1
+
+    clock["now"] = exp
+    SecurityManager.verify_token(token)
+    assert len(token_decodes) == 2
+
+
+def test_token_cache_evicts_least_recently_used(token_decodes, clock, monkeypatch):
+    monkeypatch.setattr(security, "TOKEN_CACHE_SIZE", 2)
+    tokens = {name: _token(name, int(clock["now"]) + 3600) for name in "abc"}
+
+    SecurityManager.verify_token(tokens["a"])
+    SecurityManager.verify_token(tokens["b"])
+    SecurityManager.verify_token(tokens["a"])  # hit keeps "a" hot
+    SecurityManager.verify_token(tokens["c"])  # evicts "b"
+    token_decodes.clear()
+
+    SecurityManager.verify_token(tokens["a"])
+    SecurityManager.verify_token(tokens["b"])
+    assert token_decodes == [tokens["b"]]
+
+
+def test_rate_limiter_window_rolls_over(clock):
+    limiter = security.RateLimiter()
+
+    assert [limiter.is_allowed("client", max_requests=2, window_seconds=10) for _ in range(3)] == [True, True, False]
+    assert limiter.is_allowed("other", max_requests=2, window_seconds=10)
+
+    clock["now"] += 5
+    assert not limiter.is_allowed("client", max_requests=2, window_seconds=10)
+
+    # Requests exactly window_seconds old no longer count
+    clock["now"] += 5
+    assert limiter.is_allowed("client", max_requests=2, window_seconds=10)
+    assert list(limiter.requests["client"]) == [clock["now"]]